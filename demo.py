@@ -48,23 +48,17 @@ class PropArtCustom(pa.PropArtNative):
 
     def DrawLabel(self, dc, p):
         # draw label
-        if p.font_label is None:
-            font = self._font_label
-        else:
-            font = wx.Font(p.font_label)
-        if p.IsActivated():
-            dc.SetFont(font.Bold())
-        else:
-            dc.SetFont(font)
+        font = self.GetPropLabelFont(p, p.IsActivated())
+        dc.SetFont(font)
 
         if not p.IsEnabled() or p.IsReadonly():
-            clr = wx.SystemSettings.GetColour(wx.SYS_COLOUR_GRAYTEXT)
+            clr = self.GetSysColour(wx.SYS_COLOUR_GRAYTEXT)
         else:
-            clr = wx.SystemSettings.GetColour(wx.SYS_COLOUR_BTNTEXT)
+            clr = self.GetSysColour(wx.SYS_COLOUR_BTNTEXT)
         dc.SetTextForeground(clr)
         rc = p.regions['label']
         dc.SetClippingRegion(rc)
-        (w, h) = dc.GetTextExtent(p.label)
+        (w, h) = self.GetTextExtent(dc, p.label, font)
 
         dc.DrawText(p.label, rc.x, rc.y + (rc.height - h) // 2)
         p.show_label_tips = w > rc.width
@@ -73,26 +67,22 @@ class PropArtCustom(pa.PropArtNative):
     def DrawSplitter(self, dc, p):
         # draw splitter
         rcs = p.regions['splitter']
-        dc.SetPen(wx.Pen(wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DSHADOW)))
+        dc.SetPen(self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DSHADOW)))
         dc.DrawLine(rcs.right - 1, rcs.top, rcs.right - 1, rcs.bottom)
-        dc.SetPen(wx.Pen(wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DHILIGHT)))
+        dc.SetPen(self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DHILIGHT)))
         dc.DrawLine(rcs.right, rcs.top, rcs.right, rcs.bottom)
 
     def DrawBackground(self, dc, p):
         # draw background
         rc = p.GetRect()
         rcs = p.regions.get('splitter', rc)
-        bg = wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DFACE)
-        brush = wx.Brush(bg)
-        dc.SetBrush(brush)
+        bg = self.GetSysColour(wx.SYS_COLOUR_3DFACE)
+        dc.SetBrush(self.GetBrush(bg))
         dc.DrawRectangle(rc.x, rc.y, rcs.right, rc.height)
 
     def DrawValue(self, dc, p):
         # draw value
-        if p.font_value is None:
-            font = self._font_value
-        else:
-            font = wx.Font(p.font_value)
+        font = self.GetPropValueFont(p)
         dc.SetFont(font)
 
         p.show_value_tips = False
@@ -121,23 +111,23 @@ class PropArtCustom(pa.PropArtNative):
                 if not crbg:
                     crbg = self.bg_clr
             c = wx.Colour(crbg)
-            dc.SetPen(wx.Pen(wx.Colour(c), 1, wx.PENSTYLE_SOLID))
+            dc.SetPen(self.GetPen(c, 1, wx.PENSTYLE_SOLID))
             rc = p.regions['value']
             rcbg = wx.Rect(*rc)
 
             if p.activated:
-                dc.SetBrush(wx.Brush(wx.Colour(c.red, c.green, c.blue, 128)))
+                dc.SetBrush(self.GetBrush(wx.Colour(c.red, c.green, c.blue, 128)))
                 rcbg.Deflate(0, 1)
             else:
-                dc.SetBrush(wx.Brush(wx.Colour(c.red, c.green, c.blue, 255)))
+                dc.SetBrush(self.GetBrush(wx.Colour(c.red, c.green, c.blue, 255)))
 
             dc.DrawRectangle(rcbg)
 
-            dc.SetPen(wx.Pen(crtxt, 1, wx.PENSTYLE_TRANSPARENT))
+            dc.SetPen(self.GetPen(crtxt, 1, wx.PENSTYLE_TRANSPARENT))
             dc.SetTextForeground(crtxt)
 
             value = p.GetValueAsString()
-            (w, h) = dc.GetTextExtent(value)
+            (w, h) = self.GetTextExtent(dc, value, font)
             dc.SetClippingRegion(rc)
             dc.DrawText(value, rc.x + 5, rc.top + (rc.height - h) // 2)
             p.show_value_tips = rc.width < w
@@ -157,13 +147,13 @@ class PropArtCustom(pa.PropArtNative):
             if not crbg:
                 crbg = self.bg_clr
 
-        dc.SetPen(wx.Pen(wx.Colour(crbg)))
+        dc.SetPen(self.GetPen(crbg))
         dc.DrawLine(rc.left, rc.bottom, rc.right, rc.bottom)
 
         # title top & bottom border
-        dc.SetPen(wx.Pen(wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DSHADOW)))
+        dc.SetPen(self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DSHADOW)))
         dc.DrawLine(rc.left, rc.bottom, rcs.right, rc.bottom)
-        dc.SetPen(wx.Pen(wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DHILIGHT)))
+        dc.SetPen(self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DHILIGHT)))
         dc.DrawLine(rc.left, rc.top, rcs.right, rc.top)
 
 class Prop(PropBase):
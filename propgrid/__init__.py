@@ -6,3 +6,4 @@ from .formatters import *
 from .validators import *
 from .propart import *
 from .propxpm import *
+from .signals import *
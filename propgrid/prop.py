@@ -24,79 +24,190 @@ wxEVT_PROP_REFRESH = wx.NewEventType()
 wxEVT_PROP_DROP = wx.NewEventType()
 wxEVT_PROP_BEGIN_DRAG = wx.NewEventType()
 
-EVT_PROP_SELECTED = wx.PyEventBinder(wxEVT_PROP_SELECTED, 1)
-EVT_PROP_CHANGING = wx.PyEventBinder(wxEVT_PROP_CHANGING, 1)
-EVT_PROP_CHANGED = wx.PyEventBinder(wxEVT_PROP_CHANGED, 1)
-EVT_PROP_HIGHLIGHTED = wx.PyEventBinder(wxEVT_PROP_HIGHLIGHTED, 1)
-EVT_PROP_RIGHT_CLICK = wx.PyEventBinder(wxEVT_PROP_RIGHT_CLICK, 1)
-EVT_PROP_COLLAPSED = wx.PyEventBinder(wxEVT_PROP_COLLAPSED, 1)
-EVT_PROP_EXPANDED = wx.PyEventBinder(wxEVT_PROP_EXPANDED, 1)
-EVT_PROP_DOUBLE_CLICK = wx.PyEventBinder(wxEVT_PROP_DOUBLE_CLICK, 1)
-EVT_PROP_INDENT = wx.PyEventBinder(wxEVT_PROP_INDENT, 1)
-EVT_PROP_KEYDOWN = wx.PyEventBinder(wxEVT_PROP_KEYDOWN, 1)
-EVT_PROP_RESIZE = wx.PyEventBinder(wxEVT_PROP_RESIZE, 1)
-EVT_PROP_REFRESH = wx.PyEventBinder(wxEVT_PROP_REFRESH, 1)
-EVT_PROP_DROP = wx.PyEventBinder(wxEVT_PROP_DROP, 1)
-EVT_PROP_BEGIN_DRAG = wx.PyEventBinder(wxEVT_PROP_BEGIN_DRAG, 1)
+class PropEventBinder(wx.PyEventBinder):
+    """
+    event binder which counts the handlers bound with it
+
+    So the prop events do not need to be created if no handler is bound (see
+    PropGrid.SetDirectEvents). The handlers attached in other ways (e.g.,
+    Connect or another binder of the same event type) are not counted.
+    """
+    _binders = {}
+
+    def __init__(self, evtType, expectedIDs=0):
+        wx.PyEventBinder.__init__(self, evtType, expectedIDs)
+        self.count = 0
+        PropEventBinder._binders[self.typeId] = self
+
+    def Bind(self, target, id1, id2, function):
+        wx.PyEventBinder.Bind(self, target, id1, id2, function)
+        self.count += 1
+
+    def Unbind(self, target, id1, id2, handler=None):
+        success = wx.PyEventBinder.Unbind(self, target, id1, id2, handler)
+        if success:
+            self.count = max(self.count - 1, 0)
+        return success
+
+    def IsBound(self):
+        """return true if any handler is bound with the binder"""
+        return self.count > 0
+
+    @staticmethod
+    def IsEventBound(evtType):
+        """return true if any handler may be bound to the event type"""
+        binder = PropEventBinder._binders.get(evtType, None)
+        return binder is None or binder.count > 0
+
+EVT_PROP_SELECTED = PropEventBinder(wxEVT_PROP_SELECTED, 1)
+EVT_PROP_CHANGING = PropEventBinder(wxEVT_PROP_CHANGING, 1)
+EVT_PROP_CHANGED = PropEventBinder(wxEVT_PROP_CHANGED, 1)
+EVT_PROP_HIGHLIGHTED = PropEventBinder(wxEVT_PROP_HIGHLIGHTED, 1)
+EVT_PROP_RIGHT_CLICK = PropEventBinder(wxEVT_PROP_RIGHT_CLICK, 1)
+EVT_PROP_COLLAPSED = PropEventBinder(wxEVT_PROP_COLLAPSED, 1)
+EVT_PROP_EXPANDED = PropEventBinder(wxEVT_PROP_EXPANDED, 1)
+EVT_PROP_DOUBLE_CLICK = PropEventBinder(wxEVT_PROP_DOUBLE_CLICK, 1)
+EVT_PROP_INDENT = PropEventBinder(wxEVT_PROP_INDENT, 1)
+EVT_PROP_KEYDOWN = PropEventBinder(wxEVT_PROP_KEYDOWN, 1)
+EVT_PROP_RESIZE = PropEventBinder(wxEVT_PROP_RESIZE, 1)
+EVT_PROP_REFRESH = PropEventBinder(wxEVT_PROP_REFRESH, 1)
+EVT_PROP_DROP = PropEventBinder(wxEVT_PROP_DROP, 1)
+EVT_PROP_BEGIN_DRAG = PropEventBinder(wxEVT_PROP_BEGIN_DRAG, 1)
 
 
 class PropBase():
-    pass
+    __slots__ = ()
 
 class PropGeneric(PropBase):
+    """
+    the generic property
+
+    To keep large grids small, the attributes updated by the grid for every
+    row are stored in __slots__, and the ones rarely changed (e.g., colors,
+    fonts and tips) default to the class attributes below; the instance
+    __dict__ is only created once one of them is set. The drawing regions are
+    created when the row is drawn the first time, and the row rect when it is
+    laid out. On 64-bit CPython 3.11, a PropText takes about 200 bytes (plus
+    its label/value strings, and a wx.Rect once laid out), compared to about
+    2 KB and 6 wx objects with a plain instance __dict__.
+    """
+    __slots__ = ('grid', 'name', 'label', '_value', '_value_str', 'value_valid',
+                 'indent', 'activated', 'has_children', 'expanded', 'parent',
+                 '_shown', 'rect', '_regions', '_regions_key', '_draws',
+                 'formatter',
+                 'top_value_border', 'bottom_value_border', '__dict__',
+                 '__weakref__')
+
+    # the attributes (stored in __dict__ if set) copied by copy()
+    _copy_attrs = ('font_label', 'font_value', 'text_clr', 'text_clr_sel',
+                   'text_clr_disabled', 'bg_clr', 'bg_clr_sel',
+                   'bg_clr_disabled', 'data', 'label_tip', 'value_tip',
+                   'title_width', 'enable', 'visible', 'readonly', 'min_size',
+                   'show_label_tips', 'separator', 'draggable', 'configurable')
+
+    label_tip = ''
+    value_tip = ''
+    # -1 to use the default one defined in parent's art provider
+    title_width = -1
+    enable = True
+    font_label = None
+    font_value = None
+    # the fonts resolved from font_label/font_value (see _get_label_fonts)
+    _label_font_src = None
+    _label_fonts = None
+    _value_font_src = None
+    _value_font = None
+    visible = True
+    readonly = False
+    # None to use the default colors defined in parent's art provider
+    text_clr = None
+    text_clr_sel = None
+    text_clr_disabled = None
+    bg_clr = None
+    bg_clr_sel = None
+    bg_clr_disabled = None
+    if wx.Platform == '__WXMSW__':
+        min_size = wx.Size(200, 35)
+    else:
+        min_size = wx.Size(200, 25)
+    show_label_tips = False
+    show_value_tips = False
+    separator = False
+    data = None
+    draggable = True
+    configurable = True
+    # non-overlapping regions
+    _region_names = ('value', 'label', 'splitter', 'expander')
+    _draws_default = {
+        'value': True,
+        'label': True,
+        'splitter': True,
+        'expander': True
+        }
+
     def __init__(self, label=''):
         self.grid = None
         self.name = ''
         self.label = label
-        self.label_tip = ''
+        # cached GetValueAsString(), None if unknown
+        self._value_str = None
         self.value = ''
-        self.value_tip = ''
         # indicate if data is garbage
         self.value_valid = True
-        # -1 to use the default one defined in parent's art provider
-        self.title_width = -1
         self.indent = 0
         self.activated = False
-        self.enable = True
-        self.font_label = None
-        self.font_value = None
         self.has_children = False
         self.expanded = True
-        self.visible = True
-        self.readonly = False
         #self.window = None
         self.parent = None
-        self.SetTextColor(silent=True)
-        self.SetBgColor(silent=True)
-        if wx.Platform == '__WXMSW__':
-            self.min_size = wx.Size(200, 35)
-        else:
-            self.min_size = wx.Size(200, 25)
-        self.rect = wx.Rect(0, 0, 0, 0)
-        # non-overlapping regions
-        self.regions = {
-            'value': wx.Rect(),
-            'label': wx.Rect(),
-            'splitter': wx.Rect(),
-            'expander': wx.Rect()
-        }
-        self.draws = {
-            'value': True,
-            'label': True,
-            'splitter': True,
-            'expander': True
-            }
-        self.show_label_tips = False
-        self.show_value_tips = False
-        self.separator = False
-        self.data = None
+        # cached IsShown(), None if unknown
+        self._shown = None
+        # created by SetRect
+        self.rect = None
+        # created when they are used the first time
+        self._regions = None
+        # the geometry the regions are calculated for, see
+        # PropArtNative.UpdateDrawRect
+        self._regions_key = None
+        self._draws = None
         self.formatter = None
-
-        self.draggable = True
-        self.configurable = True
         self.top_value_border = False
         self.bottom_value_border = False
 
+    @property
+    def value(self):
+        """the value"""
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+        # format it again when needed
+        self._value_str = None
+
+    @property
+    def regions(self):
+        """the drawing regions, updated by the art provider"""
+        if self._regions is None:
+            self._regions = {k: wx.Rect() for k in self._region_names}
+        return self._regions
+
+    @regions.setter
+    def regions(self, regions):
+        self._regions = regions
+        self._regions_key = None
+
+    @property
+    def draws(self):
+        """the parts to be drawn"""
+        if self._draws is None:
+            self._draws = dict(self._draws_default)
+        return self._draws
+
+    @draws.setter
+    def draws(self, draws):
+        self._draws = draws
+
     def _prepare_copy(self):
         pass
 
@@ -107,39 +218,40 @@ class PropGeneric(PropBase):
         self._prepare_copy()
 
         self.grid = p.grid
-        if p.font_label:
-            self.font_label = wx.Font(p.font_label)
-        if p.font_value:
-            self.font_value = wx.Font(p.font_value)
-        self.SetTextColor(p.text_clr, p.text_clr_sel, p.text_clr_disabled, True)
-        self.SetBgColor(p.bg_clr, p.bg_clr_sel, p.bg_clr_disabled, True)
-        self.data = p.data
+        # only copy the attributes set on p, so the others still use the class
+        # defaults instead of filling the __dict__
+        attrs = p.__dict__
+        for name in self._copy_attrs:
+            if name in attrs:
+                value = attrs[name]
+                if name in ('font_label', 'font_value') and value:
+                    value = wx.Font(value)
+                elif name == 'data':
+                    value = copy.deepcopy(value)
+                setattr(self, name, value)
+            else:
+                self.__dict__.pop(name, None)
+        if 'show_label_tips' in attrs:
+            self.show_value_tips = attrs['show_label_tips']
+        else:
+            self.__dict__.pop('show_value_tips', None)
         if type(self) == type(p) and self.formatter is None and p.formatter:
             self.formatter = copy.copy(p.formatter)
 
         self.name = p.name
         self.label = p.label
-        self.label_tip = p.label_tip
         self.value = p.value
-        self.value_tip = p.value_tip
         # indicate if data is garbage
         self.value_valid = p.value_valid
-        # -1 to use the default one defined in parent's art provider
-        self.title_width = p.title_width
         self.indent = p.indent
         self.activated = p.activated
-        self.enable = p.enable
-        self.visible = p.visible
-        self.readonly = p.readonly
-        self.min_size = p.min_size
-        self.draws = p.draws
-        self.show_label_tips = p.show_label_tips
-        self.show_value_tips = p.show_label_tips
-        self.separator = p.separator
-        self.data = copy.deepcopy(p.data)
-
-        self.draggable = p.draggable
-        self.configurable = p.configurable
+        # do not share the geometry with p, it may be updated in place
+        self.rect = None if p.rect is None else wx.Rect(*p.rect)
+        self._regions = None
+        if p._regions is not None:
+            self._regions = {k: wx.Rect(*v)
+                             for k, v in six.iteritems(p._regions)}
+        self._draws = None if p._draws is None else dict(p._draws)
 
     def duplicate(self):
         """
@@ -215,7 +327,11 @@ class PropGeneric(PropBase):
         """set the name"""
         if self.name == name:
             return
+        name_old = self.name
         self.name = name
+        if self.grid is not None:
+            # keep the name index of the grid in sync
+            self.grid._on_prop_renamed(self, name_old)
         if not silent:
             self.Refresh()
 
@@ -269,6 +385,16 @@ class PropGeneric(PropBase):
         """get label font"""
         return self.font_label
 
+    def _get_label_fonts(self):
+        """return the cached (font, bold font) of the label, or None"""
+        if self.font_label is None:
+            return None
+        if self._label_font_src is not self.font_label:
+            font = wx.Font(self.font_label)
+            self._label_fonts = (font, font.Bold())
+            self._label_font_src = self.font_label
+        return self._label_fonts
+
     def Visible(self, visible, silent=True):
         """
         show/hide the property
@@ -287,6 +413,7 @@ class PropGeneric(PropBase):
         if self.visible == visible:
             return
         self.visible = visible
+        self._on_shown_changed()
         if not silent:
             self.Refresh(True)
 
@@ -295,10 +422,26 @@ class PropGeneric(PropBase):
         return self.visible
 
     def IsShown(self):
+        """return true if the property and all its parents are shown"""
+        if self._shown is None:
+            self._update_shown()
+        return self._shown
+
+    def _update_shown(self):
+        """update the cached IsShown(); the parent's is assumed up to date"""
         parent = self.GetParent()
         if parent is not None:
-            return self.IsVisible() and parent.IsExpanded() and parent.IsShown()
-        return self.IsVisible()
+            self._shown = self.IsVisible() and parent.IsExpanded() and \
+                          parent.IsShown()
+        else:
+            self._shown = self.IsVisible()
+        return self._shown
+
+    def _on_shown_changed(self):
+        """the visibility of the property and its children is changed"""
+        self._shown = None
+        if self.grid is not None:
+            self.grid._on_prop_shown_changed(self)
 
     def Show(self):
         self.Visible(True)
@@ -315,7 +458,9 @@ class PropGeneric(PropBase):
         """set the parent property"""
         if prop and prop.GetIndent() >= self.GetIndent():
             return
-        self.parent = prop
+        if self.parent is not prop:
+            self.parent = prop
+            self._shown = None
 
     def GetParent(self):
         """return the parent property"""
@@ -338,7 +483,11 @@ class PropGeneric(PropBase):
             except:
                 traceback.print_exc(file=sys.stdout)
                 return False
+            old_value = self.value
             self.value = value
+            if self.grid is not None and self.grid.IsBatching():
+                # notify the change when the batch ends
+                self.grid._on_prop_value_changed(self, old_value)
             if not silent:
                 self.Refresh()
             return True
@@ -350,6 +499,12 @@ class PropGeneric(PropBase):
 
     def GetValueAsString(self):
         """get the value as string"""
+        if self._value_str is None:
+            self._value_str = self._format_value()
+        return self._value_str
+
+    def _format_value(self):
+        """format the value, its result is cached by GetValueAsString"""
         try:
             if self.formatter and self.GetValueValid():
                 # ignore format if data is not valid yet
@@ -366,7 +521,9 @@ class PropGeneric(PropBase):
 
     def SetValueValid(self, valid):
         """mark the value valid"""
-        self.value_valid = valid
+        if self.value_valid != valid:
+            self.value_valid = valid
+            self._value_str = None
 
     def GetValueValid(self):
         """return if the value is valid"""
@@ -402,6 +559,15 @@ class PropGeneric(PropBase):
         """get value font"""
         return self.font_value
 
+    def _get_value_font(self):
+        """return the cached font of the value, or None"""
+        if self.font_value is None:
+            return None
+        if self._value_font_src is not self.font_value:
+            self._value_font = wx.Font(self.font_value)
+            self._value_font_src = self.font_value
+        return self._value_font
+
     def Formatter(self, formatter):
         """set value formatter"""
         self.SetFormatter(formatter)
@@ -413,6 +579,7 @@ class PropGeneric(PropBase):
            not hasattr(formatter, 'format') or not hasattr(formatter, 'coerce'):
             formatter = None
         self.formatter = formatter
+        self._value_str = None
 
     def GetFormatter(self):
         """get value formatter"""
@@ -429,6 +596,9 @@ class PropGeneric(PropBase):
         if indent == self.indent:
             return
         self.indent = indent
+        if self.grid is not None:
+            # the parent/children may be changed
+            self.grid._on_prop_indent_changed(self)
         if not silent:
             self.SendPropEvent(wxEVT_PROP_INDENT)
 
@@ -446,6 +616,7 @@ class PropGeneric(PropBase):
         if expand == self.expanded:
             return
         self.expanded = expand
+        self._on_shown_changed()
 
         if silent or not self.HasChildren():
             return
@@ -610,8 +781,20 @@ class PropGeneric(PropBase):
 
     def GetRect(self):
         """return the prop rect"""
+        if self.rect is None:
+            return wx.Rect(0, 0, 0, 0)
         return wx.Rect(*self.rect)
 
+    def OffsetRect(self, dx, dy):
+        """move the prop rect and its drawing regions"""
+        if self.rect is not None:
+            self.rect.Offset(dx, dy)
+        if self._regions is not None:
+            for rc in six.itervalues(self._regions):
+                rc.Offset(dx, dy)
+            # the regions no longer match the geometry they are calculated for
+            self._regions_key = None
+
     def MinSize(self, size, silent=True):
         """set the min size"""
         self.SetMinSize(size, silent)
@@ -630,7 +813,7 @@ class PropGeneric(PropBase):
 
     def GetSize(self):
         """return the current size"""
-        return self.rect.GetSize()
+        return self.GetRect().GetSize()
 
     def GetShowLabelTips(self):
         """return whether label tooltip is allowed"""
@@ -669,12 +852,12 @@ class PropGeneric(PropBase):
     def HitTest(self, pt):
         """find the mouse position relative to the property"""
         # bottom edge
-        rc = wx.Rect(*self.rect)
+        rc = self.GetRect()
         rc.SetTop(rc.bottom - 2)
         if rc.Contains(pt):
             return 'bottom_edge'
         # top edge
-        rc = wx.Rect(*self.rect)
+        rc = self.GetRect()
         rc.SetBottom(rc.top + 2)
         if rc.Contains(pt):
             return 'top_edge'
@@ -745,6 +928,12 @@ class PropGeneric(PropBase):
     def SendPropEvent(self, event):
         """ send property grid event to parent"""
         win = self.GetGrid()
+        if getattr(win, '_direct_events', False) and \
+           not PropEventBinder.IsEventBound(event):
+            # no one else is listening, let the grid process it directly; as
+            # the grid handles the event, it is never vetoed
+            win._on_prop_event(event, self)
+            return True
         evt = PropEvent(event, self)
         evt.SetEventObject(win)
         evt_handler = win.GetEventHandler()
@@ -793,10 +982,8 @@ class PropEvent(wx.PyCommandEvent):
         return self.data
 
 class PropControl(PropGeneric):
-    def __init__(self, *args, **kwargs):
-        PropGeneric.__init__(self, *args, **kwargs)
-        self.window = None
-        self.allow_editing = True
+    window = None
+    allow_editing = True
 
     def __del__(self):
         self.DestroyControl()
@@ -839,6 +1026,12 @@ class PropControl(PropGeneric):
             wx.CallAfter(self.LayoutControl)
         super().SetRect(rc)
 
+    def OffsetRect(self, dx, dy):
+        """move the prop rect and its drawing regions"""
+        if self.window is not None:
+            wx.CallAfter(self.LayoutControl)
+        super().OffsetRect(dx, dy)
+
     def doCreateControl(self):
         return None
 
@@ -974,6 +1167,9 @@ class PropControl(PropGeneric):
         """re-positioning the control"""
         if self.window is None:
             return
+        if self._regions is None:
+            # the prop has not been drawn yet
+            self.grid.GetArtProvider().UpdateDrawRect(self)
         rc = self.grid.GetScrolledRect(wx.Rect(*self.regions['value']))
         self.window.SetSize(rc.GetSize())
         self.window.Move(rc.GetTopLeft())
@@ -1007,19 +1203,14 @@ class PropControl(PropGeneric):
             self.window.Refresh()
 
 class PropSeparator(PropGeneric):
-    def __init__(self, *args, **kwargs):
-        PropGeneric.__init__(self, *args, **kwargs)
-        self.regions = {
-                'label': wx.Rect(),
-                'expander': wx.Rect()
-                }
-        self.draws = {
-                'value': False,
-                'label': True,
-                'splitter': False,
-                'expander': True
-                }
-        self.Separator(True)
+    separator = True
+    _region_names = ('label', 'expander')
+    _draws_default = {
+        'value': False,
+        'label': True,
+        'splitter': False,
+        'expander': True
+        }
 
 class PropEditBox(PropControl):
     def doCreateControl(self):
@@ -1385,8 +1576,8 @@ class PropFont(PropControl):
             if not silent:
                 self.Refresh()
 
-    def GetValueAsString(self):
-        """get the value as string"""
+    def _format_value(self):
+        """format the value"""
         font =  wx.Font(self.GetValue())
         return f'{font.GetFaceName()}, {font.GetFractionalPointSize()}'
 
@@ -1,6 +1,68 @@
+from collections import OrderedDict
+import six
 import wx
 
 
+class TextExtentCache(object):
+    """
+    LRU cache of the text extent, keyed by (font, DC scale, text)
+
+    hits and misses count the lookups, e.g., to tune the size.
+    """
+    def __init__(self, size=4096, font_size=64):
+        self.size = size
+        self.font_size = font_size
+        self.hits = 0
+        self.misses = 0
+        self._extents = OrderedDict()
+        # id(font) -> (font, font description); the font is kept, so its id
+        # is not reused by another font while it is in the cache
+        self._fonts = OrderedDict()
+
+    def _font_key(self, font):
+        # the font description, only queried once for each font object
+        cached = self._fonts.get(id(font), None)
+        if cached is not None and cached[0] is font:
+            self._fonts.move_to_end(id(font))
+            return cached[1]
+        desc = font.GetNativeFontInfoDesc()
+        self._fonts[id(font)] = (font, desc)
+        if len(self._fonts) > self.font_size:
+            self._fonts.popitem(last=False)
+        return desc
+
+    def GetTextExtent(self, dc, text, font=None):
+        """return the (width, height) of text drawn with font on dc"""
+        if font is None:
+            # a new font object is returned each time, so do not cache it
+            key = dc.GetFont().GetNativeFontInfoDesc()
+        else:
+            key = self._font_key(font)
+        # the extent changes with the DPI (e.g., on another monitor)
+        key = (key, dc.GetContentScaleFactor(), text)
+        extent = self._extents.get(key, None)
+        if extent is not None:
+            self.hits += 1
+            self._extents.move_to_end(key)
+            return extent
+        self.misses += 1
+        extent = tuple(dc.GetFullTextExtent(text, font)[:2])
+        self._extents[key] = extent
+        if len(self._extents) > self.size:
+            self._extents.popitem(last=False)
+        return extent
+
+    def Clear(self):
+        """clear the cache and the counters"""
+        self._extents.clear()
+        self._fonts.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._extents)
+
+
 class PropArtNative(object):
     def __init__(self):
         self.margin = {'top': 0, 'bottom': 0, 'left': 0, 'right': 0}
@@ -13,8 +75,19 @@ class PropArtNative(object):
             self.expansion_width = 9
         self.splitter_width = 8
         self.indent_width = 28
-        self._font_label = wx.SystemSettings.GetFont(wx.SYS_DEFAULT_GUI_FONT)
-        self._font_value = wx.SystemSettings.GetFont(wx.SYS_DEFAULT_GUI_FONT)
+        # increased when the settings change, see GetItemKey
+        self._version = 0
+        # the cached pens, brushes and colors (LRU, at most cache_size of
+        # each kind)
+        self.cache_size = 256
+        self._pens = OrderedDict()
+        self._brushes = OrderedDict()
+        self._colours = OrderedDict()
+        self._sys_colours = OrderedDict()
+        # the text extents, shared by all grids using this art provider
+        self.text_extents = TextExtentCache()
+        self.SetLabelFont(wx.SystemSettings.GetFont(wx.SYS_DEFAULT_GUI_FONT))
+        self.SetValueFont(wx.SystemSettings.GetFont(wx.SYS_DEFAULT_GUI_FONT))
         self.text_clr = wx.SystemSettings.GetColour(wx.SYS_COLOUR_BTNTEXT)
         self.text_clr_sel = wx.WHITE
         self.text_clr_disabled = wx.SystemSettings.GetColour(
@@ -27,6 +100,7 @@ class PropArtNative(object):
     def SetTitleWidth(self, width):
         """set the title width"""
         self.title_width = width
+        self._version += 1
 
     def GetTitleWidth(self):
         """return the width"""
@@ -34,7 +108,10 @@ class PropArtNative(object):
 
     def SetLabelFont(self, font):
         """set label font"""
+        self._version += 1
         self._font_label = font
+        # for the active prop
+        self._font_label_bold = font.Bold()
 
     def GetLabelFont(self):
         """get label font"""
@@ -42,12 +119,98 @@ class PropArtNative(object):
 
     def SetValueFont(self, font):
         """set value font"""
+        self._version += 1
         self._font_value = font
 
     def GetValueFont(self):
         """get value font"""
         return self._font_value
 
+    def GetPropLabelFont(self, p, bold=False):
+        """return the cached font to draw the label of p"""
+        fonts = p._get_label_fonts()
+        if fonts is None:
+            return self._font_label_bold if bold else self._font_label
+        return fonts[1] if bold else fonts[0]
+
+    def GetPropValueFont(self, p):
+        """return the cached font to draw the value of p"""
+        font = p._get_value_font()
+        if font is None:
+            return self._font_value
+        return font
+
+    def _colour_key(self, clr):
+        if isinstance(clr, wx.Colour):
+            return clr.Get(True)
+        if isinstance(clr, (six.string_types, tuple)):
+            return clr
+        return wx.Colour(clr).Get(True)
+
+    def _add_cache(self, cache, key, value):
+        # add the value to the LRU cache, and drop the least recently used one
+        # if it is full
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        return value
+
+    def GetPen(self, clr, width=1, style=wx.PENSTYLE_SOLID):
+        """return the cached pen"""
+        key = (self._colour_key(clr), width, style)
+        pen = self._pens.get(key, None)
+        if pen is None:
+            return self._add_cache(self._pens, key,
+                                   wx.Pen(wx.Colour(clr), width, style))
+        self._pens.move_to_end(key)
+        return pen
+
+    def GetBrush(self, clr, style=wx.BRUSHSTYLE_SOLID):
+        """return the cached brush"""
+        key = (self._colour_key(clr), style)
+        brush = self._brushes.get(key, None)
+        if brush is None:
+            return self._add_cache(self._brushes, key,
+                                   wx.Brush(wx.Colour(clr), style))
+        self._brushes.move_to_end(key)
+        return brush
+
+    def GetColour(self, clr):
+        """return the cached wx.Colour of clr (e.g., a string)"""
+        if isinstance(clr, wx.Colour):
+            return clr
+        key = self._colour_key(clr)
+        colour = self._colours.get(key, None)
+        if colour is None:
+            return self._add_cache(self._colours, key, wx.Colour(clr))
+        self._colours.move_to_end(key)
+        return colour
+
+    def GetSysColour(self, index):
+        """return the cached system color"""
+        clr = self._sys_colours.get(index, None)
+        if clr is None:
+            return self._add_cache(self._sys_colours, index,
+                                   wx.SystemSettings.GetColour(index))
+        self._sys_colours.move_to_end(index)
+        return clr
+
+    def GetTextExtent(self, dc, text, font=None):
+        """return the cached (width, height) of text"""
+        return self.text_extents.GetTextExtent(dc, text, font)
+
+    def ClearCache(self):
+        """
+        clear the cached pens, brushes and system colors
+
+        It is called by the grid when the system colors change.
+        """
+        self._version += 1
+        self._pens.clear()
+        self._brushes.clear()
+        self._colours.clear()
+        self._sys_colours.clear()
+
     def SetTextColor(self, clr=None, clr_sel=None, clr_disabled=None):
         """
         set the text colors
@@ -55,6 +218,7 @@ class PropArtNative(object):
         All values are string. If the value is None, the color will reset to
         default.
         """
+        self.ClearCache()
         self.text_clr = clr
         if not self.text_clr:
             self.text_clr = wx.SystemSettings.GetColour(wx.SYS_COLOUR_BTNTEXT)
@@ -77,6 +241,7 @@ class PropArtNative(object):
         All values are string. If the value is None, the color will reset to
         default.
         """
+        self.ClearCache()
         GetColour = wx.SystemSettings.GetColour
         self.bg_clr = clr
         if not self.bg_clr:
@@ -92,6 +257,53 @@ class PropArtNative(object):
         """get the background colors"""
         return (self.bg_clr, self.bg_clr_sel, self.bg_clr_disabled)
 
+    def GetVersion(self):
+        """return the version of the settings, increased when they change"""
+        return self._version
+
+    def GetItemKey(self, p):
+        """
+        return the state DrawItem depends on
+
+        It is used by the grid row cache (PropGrid.SetRowCache); the row will
+        be drawn again once its key changes. The settings changed by setting
+        the attributes directly (instead of e.g., SetTitleWidth) are not
+        tracked.
+        """
+        rc = p.GetRect()
+        return (self._version, rc.width, rc.height, p.GetValueAsString(),
+                p.activated, p.IsEnabled(), p.IsReadonly(), p.label, p.indent,
+                p.HasChildren(), p.IsExpanded(), p.IsSeparator(),
+                p.title_width, p.top_value_border, p.bottom_value_border,
+                p.draws.get('value', False), p.GetTextColor(), p.GetBgColor(),
+                p.font_label, p.font_value,
+                p.GetGrid().GetBackgroundColour())
+
+    def _get_regions_key(self, p):
+        # all the values PrepareDrawRect depends on, and the art provider
+        # itself (e.g., a new one with its own PrepareDrawRect)
+        rc = p.rect
+        if rc is None:
+            rc = p.GetRect()
+        margin = self.margin
+        return (id(self), rc.x, rc.y, rc.width, rc.height, p.indent,
+                p.HasChildren(), p.title_width, self._version,
+                self.title_width, self.gap_x, self.expansion_width,
+                self.splitter_width, self.indent_width, margin['left'],
+                margin['right'], margin['top'], margin['bottom'])
+
+    def UpdateDrawRect(self, p):
+        """
+        calculate the rect for each section if the geometry is changed
+
+        The regions are only calculated again if the prop rect, indent, title
+        width or the art provider settings change.
+        """
+        key = self._get_regions_key(p)
+        if p._regions_key != key:
+            self.PrepareDrawRect(p)
+            p._regions_key = key
+
     def PrepareDrawRect(self, p):
         """calculate the rect for each section"""
         mx = self.gap_x
@@ -143,29 +355,26 @@ class PropArtNative(object):
     def DrawSplitter(self, dc, p):
         # draw splitter
         rcs = p.regions['splitter']
-        dc.SetPen(wx.Pen(wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DSHADOW)))
+        dc.SetPen(self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DSHADOW)))
         dc.DrawLine(rcs.left, rcs.top, rcs.left, rcs.bottom)
         dc.DrawLine(rcs.right - 1, rcs.top, rcs.right - 1, rcs.bottom)
-        dc.SetPen(wx.Pen(wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DHILIGHT)))
+        dc.SetPen(self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DHILIGHT)))
         dc.DrawLine(rcs.left + 1, rcs.top, rcs.left + 1, rcs.bottom)
         dc.DrawLine(rcs.right, rcs.top, rcs.right, rcs.bottom)
 
     def DrawLabel(self, dc, p):
         # draw label
-        if p.font_label is None:
-            font = self._font_label
-        else:
-            font = wx.Font(p.font_label)
+        font = self.GetPropLabelFont(p)
         dc.SetFont(font)
 
         if not p.IsEnabled() or p.IsReadonly():
-            clr = wx.SystemSettings.GetColour(wx.SYS_COLOUR_GRAYTEXT)
+            clr = self.GetSysColour(wx.SYS_COLOUR_GRAYTEXT)
         else:
-            clr = wx.SystemSettings.GetColour(wx.SYS_COLOUR_BTNTEXT)
+            clr = self.GetSysColour(wx.SYS_COLOUR_BTNTEXT)
         dc.SetTextForeground(clr)
         rc = p.regions['label']
         dc.SetClippingRegion(rc)
-        (w, h) = dc.GetTextExtent(p.label)
+        (w, h) = self.GetTextExtent(dc, p.label, font)
 
         dc.DrawText(p.label, rc.x, rc.y + (rc.height - h) // 2)
         p.show_label_tips = w > rc.width
@@ -173,10 +382,7 @@ class PropArtNative(object):
 
     def DrawValue(self, dc, p):
         # draw value
-        if p.font_value is None:
-            font = self._font_value
-        else:
-            font = wx.Font(p.font_value)
+        font = self.GetPropValueFont(p)
         dc.SetFont(font)
 
         p.show_value_tips = False
@@ -206,8 +412,8 @@ class PropArtNative(object):
                 if not crbg:
                     crbg = self.bg_clr
 
-            dc.SetPen(wx.Pen(crtxt, 1, wx.PENSTYLE_TRANSPARENT))
-            dc.SetBrush(wx.Brush(crbg))
+            dc.SetPen(self.GetPen(crtxt, 1, wx.PENSTYLE_TRANSPARENT))
+            dc.SetBrush(self.GetBrush(crbg))
 
             rc = p.regions['value']
             dc.DrawRectangle(rc)
@@ -215,7 +421,7 @@ class PropArtNative(object):
             dc.SetTextForeground(crtxt)
 
             value = p.GetValueAsString()
-            (w, h) = dc.GetTextExtent(value)
+            (w, h) = self.GetTextExtent(dc, value, font)
             dc.SetClippingRegion(rc)
             dc.DrawText(value, rc.x + 5, rc.top + (rc.height - h) // 2)
             p.show_value_tips = rc.width < w
@@ -227,7 +433,7 @@ class PropArtNative(object):
             rc = p.regions['expander']
             x = rc.x + (rc.width - w) // 2
             y = rc.y + (rc.height - h) // 2 + 1
-            dc.SetPen(wx.Pen(wx.BLACK))
+            dc.SetPen(self.GetPen(wx.BLACK))
             dc.SetBrush(wx.BLACK_BRUSH)
             render = wx.RendererNative.Get()
             if p.IsExpanded():
@@ -240,10 +446,8 @@ class PropArtNative(object):
         # draw background
         rc = p.GetRect()
         bg = p.GetGrid().GetBackgroundColour()
-        pen = wx.Pen(wx.BLACK, 1, wx.PENSTYLE_TRANSPARENT)
-        dc.SetPen(pen)
-        brush = wx.Brush(bg)
-        dc.SetBrush(brush)
+        dc.SetPen(self.GetPen(wx.BLACK, 1, wx.PENSTYLE_TRANSPARENT))
+        dc.SetBrush(self.GetBrush(bg))
         dc.DrawRectangle(rc.x, rc.y, rc.width, rc.height)
 
     def DrawBorder(self, dc, p):
@@ -255,16 +459,17 @@ class PropArtNative(object):
                     crbg = self.bg_clr_disabled
                 else:
                     crbg = self.bg_clr
-                dc.SetPen(wx.Pen(wx.Colour(crbg)))
+                dc.SetPen(self.GetPen(crbg))
                 dc.DrawLine(rc.left, rc.bottom, rc.right, rc.bottom)
 
-                clr = wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DSHADOW)
-                dc.SetPen(wx.Pen(clr))
+                clr = self.GetSysColour(wx.SYS_COLOUR_3DSHADOW)
+                dc.SetPen(self.GetPen(clr))
                 #dc.SetPen(wx.Pen(wx.RED))
                 dc.DrawLine(rc.left, rc.bottom, rc.right, rc.bottom)
             #dc.DrawLine(rc.left, rc.top, rc.left, rc.bottom)
             if top:
-                dc.SetPen(wx.Pen(wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DHILIGHT)))
+                clr = self.GetSysColour(wx.SYS_COLOUR_3DHILIGHT)
+                dc.SetPen(self.GetPen(clr))
                 dc.DrawLine(rc.left, rc.top, rc.right, rc.top)
             #dc.DrawLine(rc.left + 1, rc.top, rc.left + 1, rc.bottom)
 
@@ -288,14 +493,14 @@ class PropArtNative(object):
                     if not crbg:
                         crbg = self.bg_clr
 
-                dc.SetPen(wx.Pen(wx.Colour(crbg)))
+                dc.SetPen(self.GetPen(crbg))
                 dc.DrawLine(rc.left, rc.bottom, rc.right, rc.bottom)
         else:
             _draw_line(rc)
         # draw selected box
         if p.activated:
-            dc.SetPen(wx.Pen(wx.BLACK, 1, wx.PENSTYLE_DOT))
-            dc.SetBrush(wx.Brush(wx.BLACK, wx.BRUSHSTYLE_TRANSPARENT))
+            dc.SetPen(self.GetPen(wx.BLACK, 1, wx.PENSTYLE_DOT))
+            dc.SetBrush(self.GetBrush(wx.BLACK, wx.BRUSHSTYLE_TRANSPARENT))
             dc.DrawRectangle(p.GetRect())
 
     def DrawItem(self, dc, p):
@@ -306,7 +511,7 @@ class PropArtNative(object):
         dc.SetBackgroundMode(wx.TRANSPARENT)
         dc.DestroyClippingRegion()
 
-        self.PrepareDrawRect(p)
+        self.UpdateDrawRect(p)
 
         self.DrawBackground(dc, p)
 
@@ -319,3 +524,172 @@ class PropArtNative(object):
         self.DrawBorder(dc, p)
         if 'value' in p.regions:
             self.DrawSplitter(dc, p)
+
+    def DrawItems(self, dc, props):
+        """draw the properties"""
+        for p in props:
+            self.DrawItem(dc, p)
+
+
+class PropArtBatched(PropArtNative):
+    """
+    art provider to draw all the properties together
+
+    It looks the same as PropArtNative. But instead of drawing the properties
+    one by one, DrawItems draws the backgrounds, borders and splitters of all
+    of them with a few DrawRectangleList/DrawLineList calls, and the text
+    with one DrawTextList call per font (the text not fitting in its region
+    is still drawn with clipping, one by one). DrawItem (e.g., used by the
+    row cache) draws a single property as PropArtNative does.
+    """
+
+    def DrawItems(self, dc, props):
+        """draw the properties"""
+        props = [p for p in props if p.IsVisible()]
+        if not props:
+            return
+
+        dc.SetBackgroundMode(wx.TRANSPARENT)
+        dc.DestroyClippingRegion()
+        for p in props:
+            self.UpdateDrawRect(p)
+
+        # background
+        pen_none = self.GetPen(wx.BLACK, 1, wx.PENSTYLE_TRANSPARENT)
+        bg = props[0].GetGrid().GetBackgroundColour()
+        dc.DrawRectangleList([p.GetRect() for p in props], pen_none,
+                             self.GetBrush(bg))
+
+        for p in props:
+            self.DrawExpansion(dc, p)
+
+        # id(font) -> [font, text, coords, foregrounds]
+        texts = {}
+        # (font, foreground, text, x, y, clipping rect)
+        texts_clipped = []
+
+        def _add_text(font, clr, text, rc, x):
+            (w, h) = self.GetTextExtent(dc, text, font)
+            y = rc.y + (rc.height - h) // 2
+            if x + w > rc.x + rc.width or h > rc.height:
+                texts_clipped.append((font, clr, text, x, y, rc))
+            else:
+                t = texts.get(id(font), None)
+                if t is None:
+                    t = texts[id(font)] = [font, [], [], []]
+                t[1].append(text)
+                t[2].append((x, y))
+                t[3].append(clr)
+            return w
+
+        rcs_value, brushes_value = [], []
+        for p in props:
+            # label
+            if not p.IsEnabled() or p.IsReadonly():
+                clr = self.GetSysColour(wx.SYS_COLOUR_GRAYTEXT)
+            else:
+                clr = self.GetSysColour(wx.SYS_COLOUR_BTNTEXT)
+            rc = p.regions['label']
+            w = _add_text(self.GetPropLabelFont(p), clr, p.label, rc, rc.x)
+            p.show_label_tips = w > rc.width
+
+            # value
+            if 'value' not in p.regions:
+                continue
+            p.show_value_tips = False
+            if not p.draws.get('value', False):
+                continue
+            crtxt, crbg = self._get_value_colours(p)
+            rc = p.regions['value']
+            rcs_value.append(rc)
+            brushes_value.append(self.GetBrush(crbg))
+            w = _add_text(self.GetPropValueFont(p), self.GetColour(crtxt),
+                          p.GetValueAsString(), rc, rc.x + 5)
+            p.show_value_tips = rc.width < w
+
+        if rcs_value:
+            dc.DrawRectangleList(rcs_value, pen_none, brushes_value)
+
+        for font, text, coords, foregrounds in six.itervalues(texts):
+            dc.SetFont(font)
+            dc.DrawTextList(text, coords, foregrounds)
+        for font, clr, text, x, y, rc in texts_clipped:
+            dc.SetFont(font)
+            dc.SetTextForeground(clr)
+            dc.SetClippingRegion(rc)
+            dc.DrawText(text, x, y)
+            dc.DestroyClippingRegion()
+
+        # border
+        lines, pens = [], []
+        for p in props:
+            self._add_border_lines(p, lines, pens)
+        if lines:
+            dc.DrawLineList(lines, pens)
+
+        # selected box
+        rcs = [p.GetRect() for p in props if p.activated]
+        if rcs:
+            dc.DrawRectangleList(rcs, self.GetPen(wx.BLACK, 1, wx.PENSTYLE_DOT),
+                                 self.GetBrush(wx.BLACK,
+                                               wx.BRUSHSTYLE_TRANSPARENT))
+
+        # splitter
+        lines, pens = [], []
+        shadow = self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DSHADOW))
+        hilight = self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DHILIGHT))
+        for p in props:
+            if 'value' not in p.regions:
+                continue
+            rcs = p.regions['splitter']
+            lines.extend([(rcs.left, rcs.top, rcs.left, rcs.bottom),
+                          (rcs.right - 1, rcs.top, rcs.right - 1, rcs.bottom),
+                          (rcs.left + 1, rcs.top, rcs.left + 1, rcs.bottom),
+                          (rcs.right, rcs.top, rcs.right, rcs.bottom)])
+            pens.extend([shadow, shadow, hilight, hilight])
+        if lines:
+            dc.DrawLineList(lines, pens)
+
+    def _get_value_colours(self, p):
+        # the (text, background) colors of the value, same as DrawValue
+        if not p.IsEnabled() or p.IsReadonly():
+            return (p.text_clr_disabled or self.text_clr_disabled,
+                    p.bg_clr_disabled or self.bg_clr_disabled)
+        if p.activated:
+            return (p.text_clr_sel or self.text_clr_sel,
+                    p.bg_clr_sel or self.bg_clr_sel)
+        return (p.text_clr or self.text_clr, p.bg_clr or self.bg_clr)
+
+    def _add_border_lines(self, p, lines, pens):
+        # the lines drawn by DrawBorder (except the selected box)
+        shadow = self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DSHADOW))
+        hilight = self.GetPen(self.GetSysColour(wx.SYS_COLOUR_3DHILIGHT))
+
+        def _add_line(rc, top=True, bot=True):
+            # the bottom line in background color is covered by the shadow
+            # one, so only the latter is drawn
+            if bot:
+                lines.append((rc.left, rc.bottom, rc.right, rc.bottom))
+                pens.append(shadow)
+            if top:
+                lines.append((rc.left, rc.top, rc.right, rc.top))
+                pens.append(hilight)
+
+        rc = p.GetRect()
+        rcs = p.regions.get('splitter', None)
+        if rcs is not None and rcs.width > 0:
+            rc.right = rcs.left
+            _add_line(rc)
+            rc = p.GetRect()
+            rc.left = rcs.right
+            if p.top_value_border:
+                _add_line(rc, top=p.top_value_border, bot=p.bottom_value_border)
+            if not p.bottom_value_border:
+                if p.IsEnabled() and not p.IsReadonly():
+                    crbg = p.bg_clr_disabled or self.bg_clr_disabled
+                else:
+                    crbg = p.bg_clr or self.bg_clr
+                lines.append((rc.left, rc.bottom, rc.right, rc.bottom))
+                pens.append(self.GetPen(crbg))
+        else:
+            _add_line(rc)
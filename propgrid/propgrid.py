@@ -1,17 +1,26 @@
-import sys
-import traceback
 import math
+import time
+import contextlib
+import threading
+from collections import OrderedDict
 import six
 import wx
-import wx.py.dispatcher as dp
 from .prop import *
+from .signals import SendSignal
 from .propart import PropArtNative
 
 wxEVT_PROP_INSERT = wx.NewEventType()
 wxEVT_PROP_DELETE = wx.NewEventType()
 
-EVT_PROP_INSERT = wx.PyEventBinder(wxEVT_PROP_INSERT, 1)
-EVT_PROP_DELETE = wx.PyEventBinder(wxEVT_PROP_DELETE, 1)
+wxEVT_PROP_INSERT_BATCH = wx.NewEventType()
+wxEVT_PROP_DELETE_BATCH = wx.NewEventType()
+wxEVT_PROP_CHANGED_BATCH = wx.NewEventType()
+
+EVT_PROP_INSERT = PropEventBinder(wxEVT_PROP_INSERT, 1)
+EVT_PROP_DELETE = PropEventBinder(wxEVT_PROP_DELETE, 1)
+EVT_PROP_INSERT_BATCH = PropEventBinder(wxEVT_PROP_INSERT_BATCH, 1)
+EVT_PROP_DELETE_BATCH = PropEventBinder(wxEVT_PROP_DELETE_BATCH, 1)
+EVT_PROP_CHANGED_BATCH = PropEventBinder(wxEVT_PROP_CHANGED_BATCH, 1)
 
 class PropDropTarget(wx.DropTarget):
     def __init__(self, frame):
@@ -43,6 +52,113 @@ class PropDropTarget(wx.DropTarget):
         return d
 
 
+class PropRowIndex(object):
+    """
+    prefix sum (Fenwick tree) of the row heights
+
+    Hidden rows have zero height. The offset of a row and the row at a given
+    offset are found in O(log n); changing the height of one row is also
+    O(log n). The number of shown rows (i.e., with non-zero height) is kept
+    in the same way, so the n-th shown row can be found in O(log n) too.
+    """
+    def __init__(self, heights=None):
+        self.Build(heights or [])
+
+    def __len__(self):
+        return len(self._heights)
+
+    def _build_tree(self, values):
+        tree = [0] + values
+        n = len(values)
+        for i in six.moves.range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        return tree
+
+    def _update_tree(self, tree, index, delta):
+        i, n = index + 1, len(self._heights)
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+
+    def _sum_tree(self, tree, index):
+        s, i = 0, min(max(index, 0), len(self._heights))
+        while i > 0:
+            s += tree[i]
+            i -= i & -i
+        return s
+
+    def _find_tree(self, tree, value):
+        # return the last index with the prefix sum not larger than value
+        pos, step, n = 0, self._step, len(self._heights)
+        while step > 0:
+            if pos + step <= n and tree[pos + step] <= value:
+                pos += step
+                value -= tree[pos]
+            step >>= 1
+        return pos
+
+    def Build(self, heights):
+        """rebuild the index from the row heights in O(n)"""
+        self._heights = list(heights)
+        n = len(self._heights)
+        self._tree = self._build_tree(self._heights)
+        self._shown = self._build_tree([1 if h > 0 else 0
+                                        for h in self._heights])
+        self._step = 1 << n.bit_length() if n else 0
+
+    def Splice(self, start, heights):
+        """replace the rows from start to the end with heights"""
+        self.Build(self._heights[:start] + list(heights))
+
+    def GetHeight(self, index):
+        """return the height of the row"""
+        return self._heights[index]
+
+    def SetHeight(self, index, height):
+        """set the height of the row"""
+        height_old = self._heights[index]
+        if height == height_old:
+            return
+        self._heights[index] = height
+        self._update_tree(self._tree, index, height - height_old)
+        if (height > 0) != (height_old > 0):
+            self._update_tree(self._shown, index, 1 if height > 0 else -1)
+
+    def GetOffset(self, index):
+        """return the total height of all rows before index"""
+        return self._sum_tree(self._tree, index)
+
+    def GetTotal(self):
+        """return the total height of all rows"""
+        return self.GetOffset(len(self._heights))
+
+    def Find(self, offset):
+        """return the row at offset, or -1 if not found"""
+        if offset < 0:
+            return -1
+        pos = self._find_tree(self._tree, offset)
+        if pos >= len(self._heights):
+            return -1
+        return pos
+
+    def GetShownCount(self, index=None):
+        """return the number of shown rows before index (None for all rows)"""
+        if index is None:
+            index = len(self._heights)
+        return self._sum_tree(self._shown, index)
+
+    def FindShown(self, count):
+        """return the row with count shown rows before it, or -1"""
+        if count < 0:
+            return -1
+        pos = self._find_tree(self._shown, count)
+        if pos >= len(self._heights):
+            return -1
+        return pos
+
+
 class PropGrid(wx.ScrolledWindow):
     ID_PROP_GRID_ADD_SEP = wx.NewIdRef()
     ID_PROP_GRID_READ_ONLY = wx.NewIdRef()
@@ -71,6 +187,14 @@ class PropGrid(wx.ScrolledWindow):
     def __init__(self, frame):
         wx.ScrolledWindow.__init__(self, frame)
 
+        # BeginBatch/EndBatch nesting level, and what has been postponed
+        self._batch_count = 0
+        self._batch_refresh = False
+        self._batch_inserted = []
+        self._batch_deleted = []
+        # prop -> [old value, new value]
+        self._batch_changed = OrderedDict()
+
         self.prop_selected = None
         self.cursor_mode = self.CURSOR_STD
         self.pos_mouse_down = wx.Point(0, 0)
@@ -78,6 +202,50 @@ class PropGrid(wx.ScrolledWindow):
         self.resize_mode = self.RESIZE_NONE
 
         self._props = []
+        # name -> list of props with that name
+        self._name_index = {}
+        # prop -> position in self._props; positions at or after
+        # self._pos_dirty may be stale and are rebuilt on demand
+        self._pos_index = {}
+        self._pos_dirty = 0
+        # cumulative row heights, for hit test
+        self._rows = PropRowIndex()
+        # the min width of each row (0 if hidden), and how many rows have
+        # each width, so the max width is known without a full pass
+        self._widths = []
+        self._width_count = {}
+        self._layout_width = 0
+        # rows [_layout_start, _layout_end) need to be measured again; rows
+        # after it only shift by the height delta. _layout_end is -1 if rows
+        # from _layout_start are inserted, removed or moved.
+        self._layout_start = None
+        self._layout_end = None
+        # CheckProp is needed for rows from _check_start
+        self._check_start = None
+        # the index after the last child of each row, set by CheckProp
+        self._subtree_ends = []
+        # prop -> (key, bitmap) of the drawn rows, see SetRowCache
+        self._row_cache = False
+        self._row_cache_size = 512
+        self._row_bitmaps = OrderedDict()
+        # the refreshed props waiting to be redrawn, see SetRefreshRate
+        self._refresh_props = set()
+        self._refresh_pending = False
+        self._refresh_time = 0
+        self._refresh_fps = 60
+        self._refresh_event = True
+        # in _do_layout, and if the rows need to be repainted after it
+        self._in_layout = False
+        self._layout_refresh = False
+        # do not create the prop events if no handler is bound
+        self._direct_events = False
+        # the values posted by PostValues (from any thread), and the lock
+        self._posted_values = {}
+        self._posted_lock = threading.Lock()
+        self._posted_pending = False
+        self._posted_seq = 0
+        # event type -> the listeners added by Subscribe
+        self._listeners = {}
         self._art = PropArtNative()
 
         # cursor
@@ -99,6 +267,7 @@ class PropGrid(wx.ScrolledWindow):
         self.Bind(wx.EVT_PAINT, self.OnPaint)
         self.Bind(wx.EVT_SIZE, self.OnSize)
         self.Bind(wx.EVT_ERASE_BACKGROUND, self.OnEraseBackground)
+        self.Bind(wx.EVT_SYS_COLOUR_CHANGED, self.OnSysColourChanged)
         self.Bind(wx.EVT_LEFT_DOWN, self.OnMouseDown)
         self.Bind(wx.EVT_LEFT_UP, self.OnMouseUp)
         self.Bind(wx.EVT_RIGHT_DOWN, self.OnMouseRightClick)
@@ -110,20 +279,20 @@ class PropGrid(wx.ScrolledWindow):
         self.Bind(wx.EVT_MOUSE_CAPTURE_LOST, self.OnMouseCaptureLost)
         self.Bind(wx.EVT_MOUSE_CAPTURE_CHANGED, self.OnMouseCaptureLost)
 
-        self.Bind(EVT_PROP_SELECTED, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_CHANGING, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_CHANGED, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_HIGHLIGHTED, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_RIGHT_CLICK, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_COLLAPSED, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_EXPANDED, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_DOUBLE_CLICK, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_INDENT, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_KEYDOWN, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_RESIZE, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_REFRESH, self.OnPropRefresh)
-        self.Bind(EVT_PROP_DROP, self.OnPropEventsHandler)
-        self.Bind(EVT_PROP_BEGIN_DRAG, self.OnPropEventsHandler)
+        # the grid's own handlers are not counted by the binders, so with
+        # SetDirectEvents, the props only create the events when someone else
+        # listens (see PropEventBinder); otherwise, they call _on_prop_event
+        # directly
+        for binder in [EVT_PROP_SELECTED, EVT_PROP_CHANGING, EVT_PROP_CHANGED,
+                       EVT_PROP_HIGHLIGHTED, EVT_PROP_RIGHT_CLICK,
+                       EVT_PROP_COLLAPSED, EVT_PROP_EXPANDED,
+                       EVT_PROP_DOUBLE_CLICK, EVT_PROP_INDENT,
+                       EVT_PROP_KEYDOWN, EVT_PROP_RESIZE, EVT_PROP_DROP,
+                       EVT_PROP_BEGIN_DRAG]:
+            wx.PyEventBinder.Bind(binder, self, wx.ID_ANY, wx.ID_ANY,
+                                  self.OnPropEventsHandler)
+        wx.PyEventBinder.Bind(EVT_PROP_REFRESH, self, wx.ID_ANY, wx.ID_ANY,
+                              self.OnPropRefresh)
         #self.Bind(wx.EVT_MENU, self.OnProcessCommand)
         self.SetBackgroundStyle(wx.BG_STYLE_PAINT)
 
@@ -153,11 +322,150 @@ class PropGrid(wx.ScrolledWindow):
 
     def SetArtProvider(self, art):
         self._art = art
+        self._row_bitmaps.clear()
+        # the drawing regions are calculated by the new art provider
+        for p in self._props:
+            p._regions_key = None
         self.Refresh()
 
     def GetArtProvider(self):
         return self._art
 
+    def RowCache(self, enable=True, size=512):
+        """enable/disable the row cache"""
+        self.SetRowCache(enable, size)
+        return self
+
+    def SetRowCache(self, enable=True, size=512):
+        """
+        enable/disable the row cache
+
+        If enabled, each row is drawn once into a bitmap, which is blitted
+        when the window is painted; it is drawn again only when its key from
+        the art provider (GetItemKey, e.g., value, selection, size and the art
+        provider version) changes. At most size bitmaps are kept.
+        """
+        self._row_cache = enable
+        self._row_cache_size = size
+        self._row_bitmaps.clear()
+        self.Refresh()
+
+    def GetRowCache(self):
+        """return True if the row cache is enabled"""
+        return self._row_cache
+
+    def RefreshRate(self, fps):
+        """set the max number of times per second to redraw refreshed props"""
+        self.SetRefreshRate(fps)
+        return self
+
+    def SetRefreshRate(self, fps=60):
+        """
+        set the max number of times per second to redraw refreshed props
+
+        The props refreshed (e.g., by SetValue) are collected, and redrawn
+        together at most fps times per second. If fps is 0, each prop is
+        redrawn right away.
+        """
+        self._refresh_fps = fps
+        if fps <= 0:
+            self._flush_refresh()
+
+    def GetRefreshRate(self):
+        """get the max number of times per second to redraw refreshed props"""
+        return self._refresh_fps
+
+    def RefreshEvent(self, enable):
+        """set if EVT_PROP_REFRESH is sent to the parent"""
+        self.SetRefreshEvent(enable)
+        return self
+
+    def DirectEvents(self, enable):
+        """set if the prop events are only created when a handler is bound"""
+        self.SetDirectEvents(enable)
+        return self
+
+    def SetDirectEvents(self, enable=True):
+        """
+        set if the prop events are only created when a handler is bound
+
+        If enabled and no handler is bound to an event type with its
+        EVT_PROP_* binder, its events are not created; the props notify the
+        grid directly, and only the listeners added by Subscribe are called.
+        The handlers attached in other ways (e.g., Connect) are not counted,
+        and will not be called for such events.
+        """
+        self._direct_events = enable
+
+    def GetDirectEvents(self):
+        """get if the prop events are only created when a handler is bound"""
+        return self._direct_events
+
+    def SetRefreshEvent(self, enable=True):
+        """
+        set if EVT_PROP_REFRESH is sent to the parent
+
+        Disable it if the parent does not need it, e.g., when the values
+        are updated at a high rate.
+        """
+        self._refresh_event = enable
+
+    def GetRefreshEvent(self):
+        """get if EVT_PROP_REFRESH is sent to the parent"""
+        return self._refresh_event
+
+    def PostValues(self, values):
+        """
+        set the values of the props later in the GUI thread
+
+        values is a dict of {name or prop: value}. It can be called from any
+        thread. If a prop is posted again (by its name or itself) before the
+        values are applied, only the latest value is set; a name shared by
+        several props sets all of them. The values are applied together with one
+        batch (see BeginBatch), so the grid is only repainted once.
+        """
+        with self._posted_lock:
+            # the names are resolved in the GUI thread, so keep the order of
+            # the values to find the latest one of each prop
+            posted = self._posted_values
+            for key, value in six.iteritems(values):
+                self._posted_seq += 1
+                posted[key] = (self._posted_seq, value)
+            if self._posted_pending:
+                return
+            self._posted_pending = True
+        wx.CallAfter(self.ApplyPostedValues)
+
+    def ApplyPostedValues(self):
+        """
+        set the values posted by PostValues, return the number of props set
+        """
+        if not self:
+            # the window has been destroyed
+            return 0
+        with self._posted_lock:
+            values, self._posted_values = self._posted_values, {}
+            self._posted_pending = False
+        if not values:
+            return 0
+        # prop -> (order, value); a prop may be posted by its name and itself,
+        # and a name may be shared by several props
+        latest = {}
+        for key, (seq, value) in six.iteritems(values):
+            props = self.Get(key)
+            if not isinstance(props, list):
+                props = [props]
+            for p in props:
+                if not isinstance(p, PropBase):
+                    continue
+                if p not in latest or latest[p][0] < seq:
+                    latest[p] = (seq, value)
+        with self.BatchUpdate():
+            for p, (_, value) in sorted(six.iteritems(latest),
+                                        key=lambda item: item[1][0]):
+                p.SetValue(value)
+        return len(latest)
+
     def EditMode(self, enable):
         """set if it is allow to edit the propgrid"""
         self.SetEditMode(enable)
@@ -205,21 +513,85 @@ class PropGrid(wx.ScrolledWindow):
         if not isinstance(prop, PropBase):
             return None
 
+        if index < -1:
+            # count from the end as list.insert does
+            index = max(self.GetCount() + index, 0)
         prop.Grid(self)
         if index == -1 or index >= self.GetCount():
             self._props.append(prop)
+            if self._pos_dirty == len(self._props) - 1:
+                self._pos_dirty += 1
+            self._pos_index[prop] = len(self._props) - 1
         else:
             self._props.insert(index, prop)
-        name = prop.GetName()
-
+            self._pos_index[prop] = index
+            self._pos_dirty = min(self._pos_dirty, index)
+        self._name_index.setdefault(prop.GetName(), []).append(prop)
+        self._invalidate_layout(self._pos_index[prop])
+
+        if self.IsBatching():
+            # layout and notification are done in EndBatch
+            self._batch_inserted.append(prop)
+            return prop
         if index != -1 and (not update):
-            self.CheckProp()
+            self.CheckProp(index)
         if update:
-            self.UpdateGrid()
+            self._update_grid()
         if self.SendPropEvent(wxEVT_PROP_INSERT, prop):
-            dp.send('prop.insert', prop=prop)
+            SendSignal('prop.insert', prop=prop)
         return prop
 
+    def Extend(self, props, update=True):
+        return self.InsertMany(props, -1, update)
+
+    def InsertMany(self, props, index=-1, update=True):
+        """
+        insert a sequence of props at index, and return the inserted props
+
+        It is much faster than calling Insert for each prop: the props are
+        added to the grid at once, and only one EVT_PROP_INSERT_BATCH event
+        (with 'props', 'start' and 'end' in its data) is sent.
+        """
+        props = [p for p in props if isinstance(p, PropBase)]
+        if not props:
+            return props
+
+        index, end = self._insert_many(props, index)
+        if self.IsBatching():
+            self._batch_inserted.extend(props)
+            return props
+        if update:
+            self._update_grid()
+        else:
+            self.CheckProp(index)
+        if self.SendPropEvent(wxEVT_PROP_INSERT_BATCH, props=props, start=index,
+                              end=end):
+            SendSignal('prop.insert_batch', props=props, start=index, end=end)
+        return props
+
+    def _insert_many(self, props, index):
+        """add the props to the grid at index, return the [start, end) index"""
+        count = self.GetCount()
+        if index == -1 or index >= count:
+            index = count
+        elif index < -1:
+            # count from the end as list.insert does
+            index = max(count + index, 0)
+        self._props[index:index] = props
+        end = index + len(props)
+        for i, p in enumerate(props, index):
+            p.Grid(self)
+            self._pos_index[p] = i
+            self._name_index.setdefault(p.GetName(), []).append(p)
+        if self._pos_dirty == index == count:
+            # append to a valid position index
+            self._pos_dirty = end
+        else:
+            # the positions of the props after index are shifted
+            self._pos_dirty = min(self._pos_dirty, index)
+        self._invalidate_layout(index)
+        return index, end
+
     def CopyProp(self, prop, index=-1, update=True):
         if not isinstance(prop, PropBase):
             return None
@@ -244,41 +616,143 @@ class PropGrid(wx.ScrolledWindow):
                 activated = True
                 self.SetSelection(-1)
             del self._props[index]
+            self._unindex_prop(prop)
+            self._pos_dirty = min(self._pos_dirty, index)
+            self._invalidate_layout(index)
 
-            if index != -1 and (not update):
-                self.CheckProp()
+            if index != -1 and (not update) and not self.IsBatching():
+                self.CheckProp(index)
             if index >= self.GetCount():
                 index = self.GetCount() - 1
 
             if activated:
                 self.SetSelection(index)
             if update:
-                self.UpdateGrid()
+                self._update_grid()
             return True
         return False
 
+    def Clear(self):
+        """
+        delete all the props
+
+        Unlike DeleteAll, only one EVT_PROP_DELETE_BATCH event is sent; the
+        props will not be deleted if it is vetoed.
+        """
+        props = self._props
+        if not props:
+            return True
+        if self.IsBatching():
+            self._batch_deleted.extend(props)
+        elif self.SendPropEvent(wxEVT_PROP_DELETE_BATCH, props=list(props)):
+            SendSignal('prop.delete_batch', props=list(props))
+        else:
+            return False
+
+        with self.BatchUpdate():
+            self.SetSelection(-1)
+            for p in props:
+                if isinstance(p, PropControl):
+                    # destroy the live editor
+                    p.DestroyControl()
+            if PropGrid.drag_pg == self:
+                PropGrid.drag_prop = None
+                PropGrid.drag_pg = None
+                PropGrid.drag_state = 0
+            self.prop_under_mouse = None
+
+            self._props = []
+            self._name_index = {}
+            self._pos_index = {}
+            self._pos_dirty = 0
+            self._widths = []
+            self._width_count = {}
+            self._subtree_ends = []
+            self._row_bitmaps.clear()
+            self._rows.Build([])
+            self._invalidate_layout(0)
+            self.Refresh()
+        return True
+
     def DeleteAll(self, update=True):
         for i in range(len(self._props) - 1, -1, -1):
             self.Delete(self._props[i], update)
 
     def Delete(self, prop, update=True):
+        if self.IsBatching():
+            # the deletion is notified in EndBatch, and can not be vetoed
+            p = self.Get(prop)
+            if isinstance(p, PropBase) and self.Remove(p, update):
+                self._batch_deleted.append(p)
+                return True
+            return False
         if self.SendPropEvent(wxEVT_PROP_DELETE, prop):
-            dp.send('prop.delete', prop=prop)
+            SendSignal('prop.delete', prop=prop)
             return self.Remove(prop, update)
         else:
             return False
 
+    def _unindex_prop(self, prop):
+        """remove the prop from the name and position index"""
+        self._pos_index.pop(prop, None)
+        self._row_bitmaps.pop(prop, None)
+        props = self._name_index.get(prop.GetName(), [])
+        if prop in props:
+            props.remove(prop)
+            if not props:
+                del self._name_index[prop.GetName()]
+
+    def _on_prop_renamed(self, prop, name_old):
+        """update the name index after the prop name is changed"""
+        props = self._name_index.get(name_old, [])
+        if prop not in props:
+            # the prop does not belong to this grid
+            return
+        props.remove(prop)
+        if not props:
+            del self._name_index[name_old]
+        self._name_index.setdefault(prop.GetName(), []).append(prop)
+
+    def _on_prop_shown_changed(self, prop):
+        """update the cached visibility of the prop and its children"""
+        index = self.Index(prop)
+        if index == -1:
+            # the prop may be wrapped by the one in the grid, update all
+            for p in self._props:
+                p._update_shown()
+            self._invalidate_layout(0)
+            return
+        end = self._subtree_end(index)
+        for p in self._props[index:end]:
+            p._update_shown()
+        self._invalidate_layout(index, end)
+
+    def _on_prop_indent_changed(self, prop):
+        """the prop tree is changed from the prop"""
+        index = self.Index(prop)
+        # the prop may be wrapped by the one in the grid, update all
+        self._invalidate_layout(max(index, 0))
+
+    def _update_pos_index(self):
+        """rebuild the stale part of the position index"""
+        props = self._props
+        pos_index = self._pos_index
+        for i in six.moves.range(self._pos_dirty, len(props)):
+            pos_index[props[i]] = i
+        self._pos_dirty = len(props)
+
     def Index(self, prop):
         """return the index of prop, or -1 if not found"""
         p = self.Get(prop)
-        if not p:
+        if not isinstance(p, PropBase):
             return -1
-        try:
-            idx = self._props.index(p)
-            return idx
-        except ValueError:
-            traceback.print_exc(file=sys.stdout)
-        return -1
+        idx = self._pos_index.get(p, None)
+        if idx is None:
+            return -1
+        if idx >= self._pos_dirty:
+            self._update_pos_index()
+            idx = self._pos_index[p]
+        return idx
 
     def Get(self, prop):
         """return the prop instance"""
@@ -287,12 +761,12 @@ class PropGrid(wx.ScrolledWindow):
             return prop
         elif isinstance(prop, six.string_types):
             # search the prop name
-            props = [p for p in self._props if p.GetName() == prop]
+            props = self._name_index.get(prop, None)
             if not props:
                 return None
             elif len(props) == 1:
                 return props[0]
-            return props
+            return sorted(props, key=self.Index)
         elif isinstance(prop, int):
             # prop is the index
             index = prop
@@ -358,6 +832,115 @@ class PropGrid(wx.ScrolledWindow):
         self.LayoutAll()
         self.Refresh()
 
+    def _update_grid(self):
+        """update the grid, only layout the rows that have been changed"""
+        with self.BatchUpdate():
+            # layout and repaint are done when the outermost batch ends
+            self.Refresh()
+
+    def Refresh(self, eraseBackground=True, rect=None):
+        """repaint the grid; postponed to EndBatch in batch mode"""
+        if self.IsBatching():
+            self._batch_refresh = True
+            return
+        if rect is None:
+            # no need to repaint the refreshed props again
+            self._refresh_props.clear()
+        super().Refresh(eraseBackground, rect)
+
+    def RefreshRect(self, rect, eraseBackground=True):
+        """repaint the rect; postponed to EndBatch in batch mode"""
+        if self.IsBatching():
+            self._batch_refresh = True
+            return
+        super().RefreshRect(rect, eraseBackground)
+
+    def BeginBatch(self):
+        """
+        postpone the layout, repaint and insert/delete notifications
+
+        Calls can be nested; everything is done once when the outermost
+        EndBatch is called. In batch mode, Delete can not be vetoed.
+        The values changed by SetValue are sent together with
+        EVT_PROP_CHANGED_BATCH; if it is vetoed, the values are restored.
+        """
+        self._batch_count += 1
+
+    def EndBatch(self):
+        """finish the batch started by BeginBatch"""
+        if self._batch_count == 0:
+            return
+        if self._batch_count > 1:
+            self._batch_count -= 1
+            return
+
+        inserted, self._batch_inserted = self._batch_inserted, []
+        deleted, self._batch_deleted = self._batch_deleted, []
+        changed, self._batch_changed = self._batch_changed, OrderedDict()
+        # ignore the props that are inserted and then deleted in the batch
+        added = set(inserted)
+        removed = set(deleted)
+        inserted = [p for p in inserted if p not in removed]
+        deleted = [p for p in deleted if p not in added]
+
+        if self._layout_start is not None or self._check_start is not None:
+            self._batch_refresh = True
+        try:
+            # still in batch mode, so the rows are not repainted one by one
+            self._do_layout()
+        finally:
+            # leave the batch mode even if the layout fails
+            self._batch_count = 0
+            refresh, self._batch_refresh = self._batch_refresh, False
+        if refresh:
+            self.Refresh()
+
+        if deleted and self.SendPropEvent(wxEVT_PROP_DELETE_BATCH, props=deleted):
+            SendSignal('prop.delete_batch', props=deleted)
+        if inserted and self.SendPropEvent(wxEVT_PROP_INSERT_BATCH, props=inserted):
+            SendSignal('prop.insert_batch', props=inserted)
+
+        # (prop, old value, new value), ignore the deleted props and the ones
+        # changed back
+        changes = [(p, v[0], v[1]) for p, v in six.iteritems(changed)
+                   if p in self._pos_index and v[0] != v[1]]
+        if not changes:
+            return
+        if self.SendPropEvent(wxEVT_PROP_CHANGED_BATCH, changes=changes):
+            SendSignal('prop.changed_batch', changes=changes)
+        else:
+            # vetoed by parent, restore the values
+            for p, old, _ in reversed(changes):
+                p.SetValue(old, True)
+            self.Refresh()
+
+    def _on_prop_value_changed(self, prop, old):
+        """record the value change in batch mode"""
+        change = self._batch_changed.get(prop, None)
+        if change is None:
+            self._batch_changed[prop] = [old, prop.GetValue()]
+        else:
+            change[1] = prop.GetValue()
+
+    def IsBatching(self):
+        """return true if it is in batch mode"""
+        return self._batch_count > 0
+
+    @contextlib.contextmanager
+    def BatchUpdate(self):
+        """
+        context manager for BeginBatch/EndBatch, e.g.,
+
+            with grid.BatchUpdate():
+                for p in props:
+                    grid.Insert(p)
+        """
+        self.BeginBatch()
+        try:
+            yield self
+        finally:
+            self.EndBatch()
+
     def MoveProperty(self, prop, step):
         """move the property"""
         index = self.Index(prop)
@@ -369,6 +952,18 @@ class PropGrid(wx.ScrolledWindow):
             return
 
         # calculate the new position
+        if self._rows_valid():
+            # count the shown rows with the row index
+            rows = self._rows
+            if step < 0:
+                index2 = max(rows.FindShown(rows.GetShownCount(index) + step),
+                             0)
+            else:
+                index2 = rows.FindShown(rows.GetShownCount(index + 1) + step
+                                        - 1)
+            self.doMoveProperty(index, index2)
+            return
+
         index2 = index
         # move up
         while step < 0 and index2 >= 1:
@@ -401,32 +996,32 @@ class PropGrid(wx.ScrolledWindow):
             return
 
         prop = self.Get(index)
-        props = [prop]
+        end = index + 1
         if prop.HasChildren() and (not prop.IsExpanded()):
             # move all the children if they are not visible
-            indent = prop.GetIndent()
-            for i in six.moves.range(index + 1, self.GetCount()):
-                if self._props[i].GetIndent() <= indent:
-                    break
-                props.append(self._props[i])
-
-        i = 0
-        for p in props:
-            if index2 == -1:
-                self._props.append(p)
-            else:
-                #insert it before index2
-                self._props.insert(index2 + i, p)
-                i += 1
+            end = self._subtree_end(index)
+        if index < index2 < end:
+            # can not move into its own children
+            return
 
-        if index2 != -1 and index > index2:
-            index = index + len(props)
+        props = self._props[index:end]
+        del self._props[index:end]
+        if index2 == -1:
+            self._props.extend(props)
+        else:
+            # insert them before index2
+            if index2 > index:
+                index2 -= len(props)
+            self._props[index2:index2] = props
 
-        # delete the original properties
-        for i in six.moves.range(0, len(props)):
-            del self._props[index]
+        if index2 == -1:
+            start = index
+        else:
+            start = min(index, index2)
+        self._pos_dirty = min(self._pos_dirty, start)
+        self._invalidate_layout(start)
 
-        self.UpdateGrid()
+        self._update_grid()
 
     def MovePropertyDown(self, prop):
         """move the property one step down"""
@@ -445,17 +1040,62 @@ class PropGrid(wx.ScrolledWindow):
         # original prop will not affect the position of the new copy.
         self.MoveProperty(prop, -1)
 
+    def Subscribe(self, event, listener):
+        """
+        call listener when the property event is sent to the parent
+
+        event is the event binder (e.g., EVT_PROP_CHANGED) or type. The
+        listener is called as listener(prop, **data) before the event is sent,
+        without creating the wx event; return False to veto it.
+        """
+        eid = getattr(event, 'typeId', event)
+        listeners = self._listeners.get(eid, ())
+        if listener not in listeners:
+            # copy, so the listeners can be changed while they are called
+            self._listeners[eid] = listeners + (listener,)
+
+    def Unsubscribe(self, event, listener=None):
+        """
+        remove the listener added by Subscribe; if listener is None, remove
+        all the listeners of the event
+        """
+        eid = getattr(event, 'typeId', event)
+        listeners = self._listeners.get(eid, ())
+        if listener is None:
+            remaining = ()
+        else:
+            remaining = tuple(l for l in listeners if l != listener)
+        if len(remaining) == len(listeners):
+            return False
+        if remaining:
+            self._listeners[eid] = remaining
+        else:
+            self._listeners.pop(eid, None)
+        return True
+
     def SendPropEvent(self, event, prop=None, **kwargs):
         """send the property event to the parent"""
         prop = self.Get(prop)
         # prepare the event
         if isinstance(event, PropEvent):
             evt = event
+            eid = evt.GetEventType()
         elif isinstance(event, int):
-            evt = PropEvent(event, prop, **kwargs)
+            evt = None
+            eid = event
         else:
             raise ValueError()
 
+        for listener in self._listeners.get(eid, ()):
+            if listener(prop, **kwargs) is False:
+                return False
+
+        if evt is None:
+            if self._direct_events and not PropEventBinder.IsEventBound(eid):
+                # no handler is bound, no need to create the event
+                return True
+            evt = PropEvent(eid, prop, **kwargs)
+
         evt.SetId(self.GetId())
         eventObject = self.GetParent()
         evt.SetEventObject(eventObject)
@@ -469,6 +1109,21 @@ class PropGrid(wx.ScrolledWindow):
         if self.GetCount() == 0:
             return
         sel = self.GetSelection()
+        if self._rows_valid() and sel >= 0:
+            # find the next visible property with the row index
+            rows = self._rows
+            if down:
+                count = rows.GetShownCount(sel + 1)
+            else:
+                count = rows.GetShownCount(sel) - 1
+            sel = rows.FindShown(count)
+            if sel == -1 and loop:
+                sel = rows.FindShown(0 if down else rows.GetShownCount() - 1)
+            if sel != -1:
+                self.SetSelection(sel)
+                self.EnsureVisible(sel)
+            return
+
         looped = False
         # find the next visible property and activate it
         while True:
@@ -493,57 +1148,225 @@ class PropGrid(wx.ScrolledWindow):
 
     def PropHitTest(self, pt):
         """find the property under the mouse"""
-        for i, prop in enumerate(self._props):
-            prop = self._props[i]
-            if not prop.IsShown():
-                continue
-            if prop.GetRect().Contains(pt):
-                return i
+        if not self._rows_valid():
+            # the row index is out of date (e.g., Insert with update=False)
+            for i, prop in enumerate(self._props):
+                if not prop.IsShown():
+                    continue
+                if prop.GetRect().Contains(pt):
+                    return i
+            return -1
+        # the first row starts at y = 1 (see LayoutAll)
+        index = self._rows.Find(pt.y - 1)
+        if index != -1 and self._props[index].GetRect().Contains(pt):
+            return index
         return -1
 
+    def _invalidate_layout(self, start, end=-1):
+        """
+        mark rows [start, end) to be measured again in the next layout
+
+        end = -1 means rows from start are inserted, removed or moved.
+        """
+        if end == -1:
+            if self._check_start is None:
+                self._check_start = start
+            else:
+                self._check_start = min(self._check_start, start)
+            # the previous row may have gained or lost children
+            start = max(start - 1, 0)
+        if self._layout_start is None:
+            self._layout_start, self._layout_end = start, end
+            return
+        self._layout_start = min(self._layout_start, start)
+        if end == -1 or self._layout_end == -1:
+            self._layout_end = -1
+        else:
+            self._layout_end = max(self._layout_end, end)
+
+    def _subtree_end(self, index):
+        """return the index after the last child of the prop at index"""
+        if self._check_start is None:
+            return self._subtree_ends[index]
+        # the prop tree is not up to date, search it
+        props = self._props
+        indent = props[index].GetIndent()
+        end = index + 1
+        while end < len(props) and props[end].GetIndent() > indent:
+            end += 1
+        return end
+
+    def _measure_row(self, prop):
+        """return the (width, height) the prop takes in the layout"""
+        if not prop.IsShown():
+            return (0, 0)
+        sz = prop.GetMinSize()
+        return (sz.x, sz.y)
+
+    def _count_width(self, width, count):
+        """update the number of rows with the min width"""
+        c = self._width_count.get(width, 0) + count
+        if c > 0:
+            self._width_count[width] = c
+        else:
+            self._width_count.pop(width, None)
+
     def LayoutAll(self, update=True):
         """layout the properties"""
-        rc = self.GetClientRect()
-        (w, h) = (rc.width, 1)
+        self._invalidate_layout(0)
+        if not self.IsBatching():
+            self._do_layout(update)
+
+    def _do_layout(self, update=True):
+        """layout the rows marked by _invalidate_layout"""
+        # the rows moved by the layout are repainted at once, instead of
+        # being queued one by one (see _refresh_prop)
+        self._layout_refresh = False
+        self._in_layout = True
+        try:
+            self._layout_rows(update)
+        finally:
+            self._in_layout = False
+        if self._layout_refresh:
+            self._layout_refresh = False
+            self.Refresh()
 
-        self.CheckProp()
-        # calculate the width and height
-        for p in self._props:
-            if p.IsShown():
-                sz = p.GetMinSize()
-                w = max(w, sz.x)
-                h = h + sz.y
+    def _layout_rows(self, update):
+        """layout the rows, see _do_layout"""
+        props, rows, widths = self._props, self._rows, self._widths
+        n = len(props)
+        if self._check_start is not None:
+            self.CheckProp(self._check_start)
+
+        start, end = self._layout_start, self._layout_end
+        self._layout_start = self._layout_end = None
+        if start is None:
+            start, end = n, n
+        elif end != -1 and len(rows) != n:
+            # the rows have been changed without notifying the layout
+            start, end = 0, -1
+
+        # measure the rows; hidden rows have zero width and height
+        if end == -1:
+            for w in widths[start:]:
+                self._count_width(w, -1)
+            sizes = [self._measure_row(p) for p in props[start:]]
+            del widths[start:]
+            widths.extend(sz[0] for sz in sizes)
+            for w in widths[start:]:
+                self._count_width(w, 1)
+            rows.Splice(start, [sz[1] for sz in sizes])
+            end = n
+            delta = 0
+        else:
+            end = min(end, n)
+            offset = rows.GetOffset(end)
+            for i in six.moves.range(start, end):
+                w, h = self._measure_row(props[i])
+                self._count_width(widths[i], -1)
+                self._count_width(w, 1)
+                widths[i] = w
+                rows.SetHeight(i, h)
+            delta = rows.GetOffset(end) - offset
+
+        rc = self.GetClientRect()
+        w = max([rc.width] + list(self._width_count))
         if update:
             # update the virtual size
-            self.SetVirtualSize(wx.Size(w, h))
+            self.SetVirtualSize(wx.Size(w, 1 + rows.GetTotal()))
+
+        if w != self._layout_width:
+            # the width is changed, set the rect of all rows
+            self._layout_width = w
+            start, end, delta = 0, n, 0
 
         # set the property rect
-        rc = self.GetClientRect()
-        w, y = max(w, rc.width), 1
-        for p in self._props:
-            if p.IsShown():
-                h = p.GetMinSize().y
-                p.SetRect(wx.Rect(0, y, w, h))
-                # let art provider update drawing regions (e.g., value rect)
-                self._art.PrepareDrawRect(p)
-                y += h
-        prev_prop = None
-        for p in self._props:
+        ends = self._subtree_ends
+        y = 1 + rows.GetOffset(start)
+        i = start
+        while i < end:
+            p = props[i]
             if not p.IsShown():
+                # so are all its children
+                i = ends[i]
                 continue
-            p.top_value_border = False
-            if prev_prop is None or prev_prop.IsSeparator() or p.IsSeparator():
-                p.top_value_border = True
-            prev_prop = p
-
-        next_prop = None
-        for p in reversed(self._props):
+            h = rows.GetHeight(i)
+            p.SetRect(wx.Rect(0, y, w, h))
+            if p._regions is not None:
+                # let art provider update drawing regions (e.g., value rect);
+                # otherwise, they are created when the prop is drawn
+                self._art.UpdateDrawRect(p)
+            y += h
+            i = i + 1 if p.IsExpanded() else ends[i]
+        if delta != 0:
+            # rows below only need to shift
+            i = end
+            while i < n:
+                p = props[i]
+                if not p.IsShown():
+                    i = ends[i]
+                    continue
+                p.OffsetRect(0, delta)
+                i = i + 1 if p.IsExpanded() else ends[i]
+
+        if start < end:
+            self._update_borders(start, end)
+
+    def _rows_valid(self):
+        """return True if the row index matches the props"""
+        return (self._layout_start is None and self._check_start is None
+                and len(self._rows) == self.GetCount())
+
+    def _rows_in_rect(self, rc):
+        """yield the index of the shown rows intersecting rc, from top down"""
+        props, n = self._props, self.GetCount()
+        if rc.IsEmpty() or n == 0:
+            return
+        if self._rows_valid():
+            # find the first row from the offset index, and skip the hidden
+            # subtrees
+            ends = self._subtree_ends
+            i = self._rows.Find(max(rc.top - 1, 0))
+            if i == -1:
+                return
+        else:
+            # the layout is out of date, check all the rows
+            ends = None
+            i = 0
+        while i < n:
+            p = props[i]
             if not p.IsShown():
+                i = ends[i] if ends else i + 1
                 continue
-            p.bottom_value_border = False
-            if next_prop is None or next_prop.IsSeparator() or p.IsSeparator():
-                p.bottom_value_border = True
-            next_prop = p
+            rc_prop = p.GetRect()
+            if ends and rc_prop.top > rc.bottom:
+                break
+            if rc.Intersects(rc_prop):
+                yield i
+            i = i + 1 if (p.IsExpanded() or not ends) else ends[i]
+
+    def _update_borders(self, start, end):
+        """update the value borders of the shown rows in [start, end)"""
+        props = self._props
+        prev = start - 1
+        while prev >= 0 and not props[prev].IsShown():
+            prev -= 1
+        prev_prop = props[prev] if prev >= 0 else None
+        for i in six.moves.range(start, len(props)):
+            p = props[i]
+            if not p.IsShown():
+                continue
+            p.top_value_border = prev_prop is None or prev_prop.IsSeparator() \
+                                 or p.IsSeparator()
+            if prev_prop is not None:
+                prev_prop.bottom_value_border = prev_prop.IsSeparator() or \
+                                                p.IsSeparator()
+            prev_prop = p
+            if i >= end:
+                # the borders of the rows after it are not changed
+                return
+        if prev_prop is not None:
+            prev_prop.bottom_value_border = True
 
     def GetDrawRect(self):
         """return the drawing rect"""
@@ -556,31 +1379,97 @@ class PropGrid(wx.ScrolledWindow):
 
         return rc
 
-    def CheckProp(self):
-        """update the property status"""
-        parent = None
-        for i, prop in enumerate(self._props):
-            parent = self.Get(i - 1)
-            # find the direct parent property
+    def CheckProp(self, start=0):
+        """update the property status from start"""
+        if self._check_start is not None:
+            start = min(start, self._check_start)
+        self._check_start = None
+        props, ends = self._props, self._subtree_ends
+        n = len(props)
+        start = min(start, len(ends), n)
+        # the rows whose children may continue after start, i.e., the
+        # previous row and its parents
+        stack = []
+        if start > 0:
+            # the children of the previous prop may be removed; it will be set
+            # again by its children
+            props[start - 1].SetHasChildren(False, True)
+            stack.append(start - 1)
+            parent = props[start - 1].GetParent()
             while parent:
-                if parent.GetIndent() < prop.GetIndent():
-                    break
+                stack.append(self.Index(parent))
                 parent = parent.GetParent()
+            stack.reverse()
+        del ends[start:]
+        ends.extend([n] * (n - start))
+        for i in six.moves.range(start, n):
+            prop = props[i]
+            indent = prop.GetIndent()
+            # the rows with the same or larger indent have no more children
+            while stack and props[stack[-1]].GetIndent() >= indent:
+                ends[stack.pop()] = i
+            # find the direct parent property
+            parent = props[stack[-1]] if stack else None
             prop.SetParent(parent)
+            # the parent is updated, so is its visibility
+            prop._update_shown()
             if parent:
                 # the parent has children now
                 parent.SetHasChildren(True, True)
             # the current one does not have children yet; will be set by its
             # children
             prop.SetHasChildren(False, True)
+            stack.append(i)
+        for i in stack:
+            ends[i] = n
 
     def OnPropRefresh(self, evt):
         """refresh the property, for example, due to value changed"""
-        self.SendPropEvent(evt.GetEventType(), evt.GetProp())
-        prop = evt.GetProp()
+        self._on_prop_event(evt.GetEventType(), evt.GetProp())
+
+    def _refresh_prop(self, prop):
+        """refresh the property, for example, due to value changed"""
+        if self._refresh_event:
+            self.SendPropEvent(wxEVT_PROP_REFRESH, prop)
         if prop is None:
             return
-        rc = prop.GetRect()
+        if self._in_layout:
+            # the grid is repainted after the layout
+            self._layout_refresh = True
+            return
+        if self._refresh_fps <= 0:
+            rc = prop.GetRect()
+            rc.x, rc.y = self.CalcScrolledPosition(rc.x, rc.y)
+            self.RefreshRect(rc, True)
+            return
+        self._refresh_props.add(prop)
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            # wait for the rest of the current frame
+            elapsed = time.time() - self._refresh_time
+            delay = int((1.0 / self._refresh_fps - elapsed) * 1000)
+            wx.CallLater(max(delay, 1), self._flush_refresh)
+
+    def _flush_refresh(self):
+        """redraw the refreshed props in the visible area at once"""
+        if not self:
+            # the window has been destroyed
+            return
+        self._refresh_pending = False
+        self._refresh_time = time.time()
+        props, self._refresh_props = self._refresh_props, set()
+        rc_view = self.GetDrawRect()
+        rc = None
+        for prop in props:
+            if prop.GetGrid() is not self or not prop.IsShown():
+                continue
+            rc_prop = prop.GetRect()
+            if not rc_view.Intersects(rc_prop):
+                continue
+            rc = rc_prop if rc is None else rc.Union(rc_prop)
+        if rc is None:
+            return
+        rc = rc.Intersect(rc_view)
         rc.x, rc.y = self.CalcScrolledPosition(rc.x, rc.y)
         self.RefreshRect(rc, True)
 
@@ -606,18 +1495,41 @@ class PropGrid(wx.ScrolledWindow):
 
     def OnPropEventsHandler(self, evt):
         """process the property notification"""
-        if not self.SendPropEvent(evt.GetEventType(), evt.GetProp()):
+        return self._on_prop_event(evt.GetEventType(), evt.GetProp())
+
+    def _on_prop_event(self, eid, prop):
+        """
+        process the property notification, return False if it is vetoed by
+        parent
+
+        The props call it directly when no other handler is bound to the
+        event (see SetDirectEvents), so no event is created.
+        """
+        if eid == wxEVT_PROP_REFRESH:
+            self._refresh_prop(prop)
+            return True
+
+        if not self.SendPropEvent(eid, prop):
             # vetoed by parent, ignore the event
             return False
 
-        eid = evt.GetEventType()
         if eid in [
                 wxEVT_PROP_COLLAPSED, wxEVT_PROP_EXPANDED, wxEVT_PROP_INDENT,
                 wxEVT_PROP_RESIZE
         ]:
-            self.UpdateGrid()
+            index = self.Index(prop)
+            if index == -1:
+                # the prop may be wrapped by the one in the grid, layout all
+                self._invalidate_layout(0)
+            elif eid == wxEVT_PROP_INDENT:
+                self._invalidate_layout(index)
+            elif eid == wxEVT_PROP_RESIZE:
+                self._invalidate_layout(index, index + 1)
+            else:
+                # only the children are shown/hidden
+                self._invalidate_layout(index, self._subtree_end(index))
+            self._update_grid()
         elif eid == wxEVT_PROP_RIGHT_CLICK:
-            prop = evt.GetProp()
             if self.IsConfigurable() and prop.IsConfigurable():
                 # show configuration menu
                 menu = self.GetContextMenu(prop)
@@ -705,33 +1617,151 @@ class PropGrid(wx.ScrolledWindow):
         dc = wx.AutoBufferedPaintDC(self)
         self.DoPrepareDC(dc)
 
+        # only paint the update region, e.g., the band exposed by scrolling;
+        # the rest of the window is kept (ScrolledWindow moves the pixels
+        # with ScrollWindow), so everything drawn here shall be at fixed
+        # (unscrolled) position
         rc = self.GetDrawRect()
+        rc_update = self.GetUpdateRegion().GetBox()
+        pt = self.CalcUnscrolledPosition(rc_update.GetPosition())
+        rc_update.SetPosition(pt)
+        rc = rc.Intersect(rc_update)
+        if rc.IsEmpty():
+            return
+
+        for p in self._paint(dc, rc):
+            p.PostRefresh()
+
+    def _paint(self, dc, rc):
+        """draw the grid in rc (logical coordinates), return the drawn props"""
         #draw background
+        art = self._art
         bg = self.GetBackgroundColour()
         if not bg.IsOk():
-            bg = wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DFACE)
-        pen = wx.Pen(wx.BLACK, 1, wx.PENSTYLE_TRANSPARENT)
-        dc.SetPen(pen)
-        brush = wx.Brush(bg)
-        dc.SetBrush(brush)
+            bg = art.GetSysColour(wx.SYS_COLOUR_3DFACE)
+        dc.SetPen(art.GetPen(wx.BLACK, 1, wx.PENSTYLE_TRANSPARENT))
+        dc.SetBrush(art.GetBrush(bg))
         dc.DrawRectangle(rc.x, rc.y, rc.width, rc.height)
 
-        # draw the top edge
-        dc.SetPen(wx.Pen(wx.SystemSettings.GetColour(wx.SYS_COLOUR_3DSHADOW)))
-        dc.DrawLine(rc.left, rc.top, rc.right, rc.top)
+        # draw the top edge, above the first row
+        if rc.top <= 0:
+            dc.SetPen(art.GetPen(art.GetSysColour(wx.SYS_COLOUR_3DSHADOW)))
+            dc.DrawLine(rc.left, 0, rc.right, 0)
 
         # draw the properties
-        for p in self._props:
-            if not p.IsShown():
-                continue
-            rc_prop = p.GetRect()
-            if rc.Intersects(rc_prop):
-                self._art.DrawItem(dc, p)
-                p.PostRefresh()
+        props = [self._props[i] for i in self._rows_in_rect(rc)]
+        if self._row_cache:
+            for p in props:
+                self._draw_cached_item(dc, p)
+        else:
+            art.DrawItems(dc, props)
+        return props
+
+    def _render_rect(self, start=0, end=None, width=-1):
+        """return the rect (logical coordinates) of rows in [start, end)"""
+        # the rows shall be laid out even if the grid is in batch mode or
+        # not shown yet
+        if not self._rows_valid():
+            self._invalidate_layout(0)
+            self._do_layout(update=False)
+        n = self.GetCount()
+        if end is None or end < 0 or end > n:
+            end = n
+        start = max(0, min(start, end))
+        # the top edge is drawn at 0, above the first row
+        top = 0 if start == 0 else 1 + self._rows.GetOffset(start)
+        bottom = 1 + self._rows.GetOffset(end)
+        if width < 0:
+            width = self._layout_width or self.GetClientSize().x
+        return wx.Rect(0, top, max(width, 1), max(bottom - top, 1))
+
+    def _render(self, rc):
+        """draw rc (logical coordinates) to a bitmap"""
+        bmp = wx.Bitmap()
+        bmp.CreateWithDIPSize(rc.GetSize(), self.GetDPIScaleFactor())
+        dc = wx.MemoryDC(bmp)
+        dc.SetLogicalOrigin(rc.x, rc.y)
+        self._paint(dc, rc)
+        dc.SelectObject(wx.NullBitmap)
+        return bmp
+
+    def RenderToBitmap(self, start=0, end=None, width=-1):
+        """
+        draw the rows in [start, end) to a bitmap and return it
+
+        It works without showing the grid (e.g., to generate thumbnails or
+        benchmark the drawing), and draws the same way as the window. If
+        end is None, all the rows from start are drawn; if width is
+        negative, the width of the rows is used.
+        """
+        return self._render(self._render_rect(start, end, width))
+
+    def MeasureRender(self, start=0, end=None, width=-1, repeat=1):
+        """
+        draw the rows in [start, end) to a bitmap, and return the time (in
+        seconds) of each phase
+
+        The returned dict has
+        - 'layout': measure and position all the rows,
+        - 'regions': update the drawing regions of the drawn rows,
+        - 'paint': draw the rows to the bitmap,
+        - 'total': the sum of the above.
+        The layout and drawing regions are recomputed from scratch in each
+        round, and the fastest of the repeat rounds is returned for each
+        phase.
+        """
+        timer = time.perf_counter
+        timings = {}
+        for _ in six.moves.range(max(repeat, 1)):
+            t0 = timer()
+            self._invalidate_layout(0)
+            self._do_layout(update=False)
+            t1 = timer()
+            rc = self._render_rect(start, end, width)
+            for i in self._rows_in_rect(rc):
+                p = self._props[i]
+                p._regions_key = None
+                self._art.UpdateDrawRect(p)
+            t2 = timer()
+            self._render(rc)
+            t3 = timer()
+            for k, v in (('layout', t1 - t0), ('regions', t2 - t1),
+                         ('paint', t3 - t2), ('total', t3 - t0)):
+                timings[k] = min(timings.get(k, v), v)
+        return timings
+
+    def _draw_cached_item(self, dc, p):
+        """draw the prop with its cached bitmap, and update it if necessary"""
+        rc = p.GetRect()
+        if rc.IsEmpty():
+            return
+        key = self._art.GetItemKey(p)
+        cached = self._row_bitmaps.get(p, None)
+        if cached is None or cached[0] != key:
+            bmp = wx.Bitmap()
+            bmp.CreateWithDIPSize(rc.GetSize(), self.GetDPIScaleFactor())
+            mdc = wx.MemoryDC(bmp)
+            # draw the prop at its position to the top-left corner
+            mdc.SetLogicalOrigin(rc.x, rc.y)
+            self._art.DrawItem(mdc, p)
+            mdc.SelectObject(wx.NullBitmap)
+            cached = (key, bmp)
+            self._row_bitmaps[p] = cached
+            if len(self._row_bitmaps) > self._row_cache_size:
+                self._row_bitmaps.popitem(last=False)
+        else:
+            self._row_bitmaps.move_to_end(p)
+        dc.DrawBitmap(cached[1], rc.x, rc.y)
 
     def OnSize(self, evt):
         """resize the properties"""
-        self.UpdateGrid()
+        self._update_grid()
+        evt.Skip()
+
+    def OnSysColourChanged(self, evt):
+        """the system colors are changed, drop the cached drawing objects"""
+        self._art.ClearCache()
+        self.Refresh()
         evt.Skip()
 
     def OnEraseBackground(self, evt):
@@ -948,7 +1978,7 @@ class PropGrid(wx.ScrolledWindow):
             return
         # insert a property? Let the parent to determine what to do
         if PropGrid.drag_prop is None:
-            dp.send('prop.drop', index=index2, prop=name, grid=self)
+            SendSignal('prop.drop', index=index2, prop=name, grid=self)
             return
 
         if name != PropGrid.drag_prop.GetName():
@@ -961,24 +1991,30 @@ class PropGrid(wx.ScrolledWindow):
             return
 
         if PropGrid.drag_pg != self:
-            # drop the property from the other window, copy it
-            indent = PropGrid.drag_prop.GetIndent()
-            self.CopyProp(PropGrid.drag_prop, index2)
-            for i in six.moves.range(index + 1,
-                                     PropGrid.drag_pg.GetCount()):
-                # copy all its children
-                child = PropGrid.drag_pg.Get(i)
-                if child.GetIndent() <= indent:
-                    break
-                if index2 != -1:
-                    index2 = index2 + 1
-                self.CopyProp(child, index2)
+            # drop the property from the other window, copy it with all its
+            # children
+            drag_pg = PropGrid.drag_pg
+            props = []
+            for child in drag_pg._props[index:drag_pg._subtree_end(index)]:
+                p = child.duplicate()
+                p.SetGrid(self)
+                p.Activated(False)
+                props.append(p)
+            # add them at once, but notify each of them as Insert does
+            index2, _ = self._insert_many(props, index2)
+            if self.IsBatching():
+                self._batch_inserted.extend(props)
+            else:
+                self.CheckProp(index2)
+                for p in props:
+                    if self.SendPropEvent(wxEVT_PROP_INSERT, p):
+                        SendSignal('prop.insert', prop=p)
         else:
             # move the property if necessary
             if prop == PropGrid.drag_prop:
                 return
             self.doMoveProperty(index, index2)
-        self.UpdateGrid()
+        self._update_grid()
 
     def OnDrop(self, x, y, name):
         """drop the property"""
@@ -1100,6 +2136,7 @@ class PropSettings(wx.Dialog):
             # update the value if necessary
             self.propgrid.prop_selected.OnTextEnter()
 
+        name_old = self.prop.GetName()
         for (name, pp, _ ) in self.items:
             v = self.propgrid.Get(name)
             if isinstance(pp, PropCheckBox):
@@ -1109,4 +2146,7 @@ class PropSettings(wx.Dialog):
             else:
                 setattr(self.prop, name,
                         type(getattr(self.prop, name))(v.GetValue()))
+        if self.prop.grid is not None and self.prop.GetName() != name_old:
+            # the name is set directly, update the name index of the grid
+            self.prop.grid._on_prop_renamed(self.prop, name_old)
         event.Skip()
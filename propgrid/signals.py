@@ -0,0 +1,110 @@
+import sys
+
+
+class SignalNone(object):
+    """the backend to drop all the signals"""
+
+    def send(self, signal, **kwargs):
+        pass
+
+    def connect(self, receiver, signal):
+        raise RuntimeError('signals are disabled')
+
+    def disconnect(self, receiver, signal):
+        return False
+
+
+class SignalCallback(object):
+    """the backend to call the receivers connected in this process"""
+
+    def __init__(self):
+        # signal -> receivers
+        self._receivers = {}
+
+    def send(self, signal, **kwargs):
+        receivers = self._receivers.get(signal, None)
+        if not receivers:
+            return
+        # copy, so receivers can be (dis)connected while being called
+        for receiver in list(receivers):
+            receiver(**kwargs)
+
+    def connect(self, receiver, signal):
+        receivers = self._receivers.setdefault(signal, [])
+        if receiver not in receivers:
+            receivers.append(receiver)
+
+    def disconnect(self, receiver, signal):
+        receivers = self._receivers.get(signal, [])
+        if receiver not in receivers:
+            return False
+        receivers.remove(receiver)
+        if not receivers:
+            self._receivers.pop(signal, None)
+        return True
+
+
+class SignalDispatcher(object):
+    """the backend to send the signals with wx.py.dispatcher"""
+
+    def send(self, signal, **kwargs):
+        # wx.py.dispatcher is only imported when a receiver is connected;
+        # if no one has imported it yet, no one is listening
+        dp = sys.modules.get('wx.py.dispatcher', None)
+        if dp is not None:
+            dp.send(signal, **kwargs)
+
+    def connect(self, receiver, signal):
+        import wx.py.dispatcher as dp
+        dp.connect(receiver, signal)
+
+    def disconnect(self, receiver, signal):
+        dp = sys.modules.get('wx.py.dispatcher', None)
+        if dp is None:
+            return False
+        return dp.disconnect(receiver, signal)
+
+
+_signal_backends = {
+    'none': SignalNone,
+    'callback': SignalCallback,
+    'wx': SignalDispatcher,
+}
+_signal_backend = SignalDispatcher()
+
+
+def SetSignalBackend(backend='wx'):
+    """
+    set the backend to send the signals (e.g., 'prop.insert')
+
+    backend can be 'none' (no signal is sent), 'callback' (the receivers
+    connected with ConnectSignal in this process), 'wx' (wx.py.dispatcher,
+    the default), or an object with send/connect/disconnect methods.
+    """
+    global _signal_backend
+    if isinstance(backend, str):
+        if backend not in _signal_backends:
+            raise ValueError('unknown signal backend: %s' % backend)
+        backend = _signal_backends[backend]()
+    _signal_backend = backend
+    return backend
+
+
+def GetSignalBackend():
+    """return the signal backend"""
+    return _signal_backend
+
+
+def SendSignal(signal, **kwargs):
+    """send the signal to the receivers"""
+    _signal_backend.send(signal, **kwargs)
+
+
+def ConnectSignal(receiver, signal):
+    """call receiver(**kwargs) when the signal is sent"""
+    _signal_backend.connect(receiver, signal)
+
+
+def DisconnectSignal(receiver, signal):
+    """disconnect the receiver from the signal"""
+    return _signal_backend.disconnect(receiver, signal)